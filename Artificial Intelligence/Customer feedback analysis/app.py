@@ -1,10 +1,15 @@
 import streamlit as st
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem.porter import PorterStemmer
+import io
+import logging
+import os
 import pickle
 import time
+from batch_score import DEFAULT_CHUNKSIZE, detect_separator, read_reviews, score_chunks, score_texts
+from linear_artifact import MANIFEST_NAME, LinearScorer
+from model_store import current_version, load_version
+from prediction_cache import PredictionCache
+from preprocessing import Preprocessor
+from timing import STAGES, LatencyWindow, StageTimer
 
 # Page Configuration
 st.set_page_config(
@@ -119,19 +124,40 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Initialize NLTK
+SAMPLE_REVIEWS = [
+    "The food was absolutely amazing! Best restaurant I've ever been to.",
+    "Terrible service and the food was cold. Never coming back.",
+    "Outstanding ambiance and delicious dishes. Highly recommend!",
+    "Worst meal ever. Overpriced and tasteless.",
+    "Great experience! Will definitely come back."
+]
+
+# Text preprocessing (stopwords, stemmer and stem cache), shared across sessions
 @st.cache_resource
-def initialize_nltk():
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords', quiet=True)
-    return PorterStemmer(), set(stopwords.words('english'))
+def load_preprocessor():
+    return Preprocessor()
 
-# Load model and vectorizer
+# Latency of every analysis, shared across sessions; each one is also logged as a JSON line
 @st.cache_resource
-def load_model_and_vectorizer():
+def latency_window():
+    if not logging.getLogger("review_analyzer").handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logging.getLogger("review_analyzer").addHandler(handler)
+        logging.getLogger("review_analyzer").setLevel(logging.INFO)
+    return LatencyWindow()
+
+# Load model and vectorizer. A version published by online_train.py wins, then an exported
+# model_artifact/ (see linear_artifact.py), then the pickles. Cached per version, so a newly
+# published one is loaded on the next rerun without restarting the app.
+@st.cache_resource(max_entries=2)
+def load_model_and_vectorizer(version=None):
     try:
+        if version:
+            return load_version(version)
+        if os.path.exists(os.path.join("model_artifact", MANIFEST_NAME)):
+            scorer = LinearScorer("model_artifact")
+            return scorer, scorer
         with open("best_model.pkl", 'rb') as f:
             model = pickle.load(f)
         with open("vectorizer.pkl", 'rb') as f:
@@ -144,24 +170,25 @@ def load_model_and_vectorizer():
         st.error(f"Error loading model: {e}")
         return None, None
 
-# Text preprocessing
-def preprocess_text(text, ps, stopwords_set):
-    review = re.sub('[^a-zA-Z]', ' ', text)
-    review = review.lower().split()
-    review = [ps.stem(word) for word in review if word not in stopwords_set]
-    return ' '.join(review)
+# Predictions keyed on cleaned text, shared across sessions. One cache per model version,
+# with the sample reviews scored as soon as the version is loaded.
+@st.cache_resource(max_entries=2)
+def prediction_cache(version=None):
+    cache = PredictionCache()
+    model, vectorizer = load_model_and_vectorizer(version)
+    if model is not None:
+        score_texts(SAMPLE_REVIEWS, model, vectorizer, load_preprocessor(), cache=cache)
+    return cache
 
 # Analyze sentiment
-def analyze_sentiment(user_input, model, vectorizer, ps, stopwords_set):
+def analyze_sentiment(user_input, model, vectorizer, preprocessor, timer=None, cache=None):
     if not user_input.strip():
         return None, None, None
     
-    cleaned_review = preprocess_text(user_input, ps, stopwords_set)
-    review_vector = vectorizer.transform([cleaned_review]).toarray()
-    
-    prediction = int(model.predict(review_vector)[0])
-    probabilities = model.predict_proba(review_vector)[0]
-    confidence = probabilities[prediction] * 100
+    predictions, probabilities = score_texts([user_input], model, vectorizer, preprocessor, timer, cache)
+    prediction = int(predictions[0])
+    probabilities = probabilities[0]
+    confidence = probabilities.max() * 100
     
     return prediction, probabilities, confidence
 
@@ -218,33 +245,101 @@ def display_result(prediction, probabilities, confidence):
             </div>
         """, unsafe_allow_html=True)
 
+# Debug panel: stage timings for the last analysis, the shared p50/p95 and prediction cache counters
+def display_timings(timer, window, cache=None):
+    last = timer.as_ms()
+    summary = window.summary()
+    rows = []
+    for stage in STAGES + ("total",):
+        stats = summary.get(stage, {})
+        rows.append({
+            "Stage": stage,
+            "This request (ms)": last.get(stage),
+            "p50 (ms)": stats.get("p50"),
+            "p95 (ms)": stats.get("p95"),
+        })
+    st.markdown(f"<p style='font-size: 12px; margin: 15px 0 5px 0;'>Pipeline latency (last {summary.get('total', {}).get('n', 0)} requests)</p>", unsafe_allow_html=True)
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    if cache is not None:
+        info = cache.cache_info()
+        col1_cache, col2_cache, col3_cache = st.columns(3)
+        col1_cache.metric("Cache hits", f"{info.hits:,}")
+        col2_cache.metric("Cache misses", f"{info.misses:,}")
+        col3_cache.metric("Cached reviews", f"{info.currsize:,} / {info.maxsize:,}")
+
+# Batch scoring of uploaded files
+def batch_scoring_section(model, vectorizer, preprocessor):
+    st.markdown("<h3 style='margin-top: 20px;'>Batch Scoring</h3>", unsafe_allow_html=True)
+    uploaded = st.file_uploader("Upload a CSV or TSV file of reviews", type=["csv", "tsv", "txt"])
+    if uploaded is None:
+        return
+
+    sep = detect_separator(uploaded.name)
+    columns = list(next(read_reviews(uploaded, chunksize=1, sep=sep)).columns)
+    uploaded.seek(0)
+    text_column = st.selectbox(
+        "Review column",
+        columns,
+        index=columns.index("Review") if "Review" in columns else 0
+    )
+    chunksize = st.number_input("Reviews per chunk", min_value=100, max_value=200000, value=DEFAULT_CHUNKSIZE, step=1000)
+
+    if st.button("📊 Score File"):
+        total_rows = max(uploaded.getvalue().count(b"\n") - 1, 1)
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        output = io.StringIO()
+        rows = positives = 0
+        started = time.perf_counter()
+        chunks = score_chunks(read_reviews(uploaded, int(chunksize), sep), text_column, model, vectorizer, preprocessor)
+        for chunk in chunks:
+            chunk.to_csv(output, header=rows == 0, index=False)
+            rows += len(chunk)
+            positives += int((chunk["prediction"] == 1).sum())
+            elapsed = time.perf_counter() - started
+            progress_bar.progress(min(rows / total_rows, 1.0))
+            status_text.text(f"{rows:,} reviews scored · {rows / elapsed:,.0f} reviews/s")
+        elapsed = time.perf_counter() - started
+        progress_bar.empty()
+        st.session_state["batch_result"] = {
+            "name": os.path.splitext(uploaded.name)[0] + "_scored.csv",
+            "csv": output.getvalue(),
+            "rows": rows,
+            "positives": positives,
+            "seconds": elapsed,
+        }
+
+    result = st.session_state.get("batch_result")
+    if result:
+        col1_batch, col2_batch, col3_batch = st.columns(3)
+        col1_batch.metric("Reviews", f"{result['rows']:,}")
+        col2_batch.metric("Positive", f"{result['positives'] / max(result['rows'], 1):.1%}")
+        col3_batch.metric("Reviews / second", f"{result['rows'] / max(result['seconds'], 1e-9):,.0f}")
+        st.download_button("⬇️ Download Results", result["csv"], file_name=result["name"], mime="text/csv")
+
 # Main app
 def main():
     st.markdown("<h1 style='text-align: center; margin-bottom: 5px;'>🍽️ Restaurant Review Analyzer</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; color: #d1d5db; font-size: 16px; margin-bottom: 20px;'>Predict customer sentiment using AI</p>", unsafe_allow_html=True)
     
-    ps, all_stopwords = initialize_nltk()
-    model, vectorizer = load_model_and_vectorizer()
+    preprocessor = load_preprocessor()
+    version = current_version()
+    model, vectorizer = load_model_and_vectorizer(version)
     
     if model is None or vectorizer is None:
         st.stop()
+    cache = prediction_cache(version)
+    if version:
+        st.caption(f"Model version {version}")
     
     col1, col2 = st.columns([1, 1], gap="large")
     
-    sample_reviews = [
-        "The food was absolutely amazing! Best restaurant I've ever been to.",
-        "Terrible service and the food was cold. Never coming back.",
-        "Outstanding ambiance and delicious dishes. Highly recommend!",
-        "Worst meal ever. Overpriced and tasteless.",
-        "Great experience! Will definitely come back."
-    ]
-    
     with col1:
         
         st.markdown("<h3 style='margin-top: 0;'>Sample Reviews</h3>", unsafe_allow_html=True)
         selected_sample = st.selectbox(
             "Select a sample...",
-            sample_reviews,
+            SAMPLE_REVIEWS,
             label_visibility="collapsed"
         )
         st.markdown("</div>", unsafe_allow_html=True)
@@ -259,6 +354,7 @@ def main():
             label_visibility="collapsed"
         )
         analyze_button = st.button("🔮 Analyze Sentiment")
+        show_timings = st.checkbox("Show debug panel (timings, cache)", value=False)
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
@@ -271,26 +367,22 @@ def main():
                 result_placeholder.warning("⚠️ Please enter a review to analyze.")
             else:
                 with result_placeholder.container():
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    status_text.text("Analyzing your review...")
-                    
-                    for i in range(100):
-                        time.sleep(0.01)
-                        progress_bar.progress(i + 1)
-                    
+                    timer = StageTimer()
                     prediction, probabilities, confidence = analyze_sentiment(
-                        user_input, model, vectorizer, ps, all_stopwords
+                        user_input, model, vectorizer, preprocessor, timer, cache
                     )
-                    
-                    status_text.empty()
-                    progress_bar.empty()
+                    window = latency_window()
+                    window.record(timer, source="ui", chars=len(user_input))
                     
                     if prediction is not None:
                         display_result(prediction, probabilities, confidence)
+                        if show_timings:
+                            display_timings(timer, window, cache)
         
         st.markdown("</div>", unsafe_allow_html=True)
     
+    batch_scoring_section(model, vectorizer, preprocessor)
+    
     st.markdown("""
         <div class='developer-credit'>
             <p style='color: #9ca3af; font-size: 14px; margin-bottom: 5px;'>
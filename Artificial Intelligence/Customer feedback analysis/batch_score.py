@@ -0,0 +1,162 @@
+"""Batch sentiment scoring for large review dumps.
+
+Reads a CSV/TSV file in chunks, scores each chunk with one vectorizer
+transform and one predict_proba call on the sparse TF-IDF matrix, and
+appends the results to the output file as it goes, so memory stays flat no
+matter how big the input is.
+
+    python batch_score.py nightly_reviews.tsv -o scored.csv --chunksize 20000
+
+The Streamlit app (app.py) uses the same functions for uploaded files.
+"""
+import argparse
+import csv
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from preprocessing import Preprocessor
+from timing import STAGES, StageTimer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CHUNKSIZE = 10000
+
+
+def requires_dense(model):
+    # libsvm-based models (SVC) fitted on dense arrays refuse sparse input, whatever their tags say
+    if getattr(model, '_sparse', None) is False:
+        return True
+    try:
+        from sklearn.utils import get_tags
+    except ImportError:  # scikit-learn < 1.6; every candidate model accepts sparse input
+        return False
+    return not get_tags(model).input_tags.sparse
+
+
+def model_input(model, X):
+    """X as ``model`` accepts it: CSR for most models, dense for those that refuse sparse input.
+
+    Anything that is not a sparse matrix (the features of a LinearScorer) is passed through.
+    """
+    return X.toarray() if sparse.issparse(X) and requires_dense(model) else X
+
+
+def score_texts(texts, model, vectorizer, preprocessor, timer=None, cache=None):
+    """Score a list of reviews with one transform and one predict_proba call.
+
+    Returns (predictions, probabilities); probabilities has one column per
+    entry of model.classes_. Pass a StageTimer to collect per-stage timings.
+    With a PredictionCache, reviews whose cleaned text is cached skip
+    vectorize and predict; only the misses are scored, still in one call.
+    """
+    timer = timer or StageTimer()
+    with timer.stage('preprocess'):
+        cleaned = preprocessor.clean_batch(texts)
+    if not cleaned:
+        # predict_proba rejects 0 samples
+        return model.classes_[:0], np.empty((0, len(model.classes_)))
+    if cache is None:
+        return _predict(cleaned, model, vectorizer, timer)
+
+    with timer.stage('cache'):
+        cached = cache.get_many(cleaned)
+    misses = sorted({text for text, entry in zip(cleaned, cached) if entry is None})
+    if misses:
+        predictions, probabilities = _predict(misses, model, vectorizer, timer)
+        scored = dict(zip(misses, zip(predictions, probabilities)))
+        cache.put_many(scored.items())
+        cached = [entry if entry is not None else scored[text] for text, entry in zip(cleaned, cached)]
+    return np.array([prediction for prediction, _ in cached]), np.vstack([row for _, row in cached])
+
+
+def _predict(cleaned, model, vectorizer, timer):
+    with timer.stage('vectorize'):
+        X = vectorizer.transform(cleaned)
+    with timer.stage('predict'):
+        probabilities = model.predict_proba(model_input(model, X))
+        predictions = model.classes_[probabilities.argmax(axis=1)]
+    return predictions, probabilities
+
+
+# Streaming input and output
+def detect_separator(name):
+    return '\t' if name.lower().endswith(('.tsv', '.tab', '.txt')) else ','
+
+
+def read_reviews(source, chunksize=DEFAULT_CHUNKSIZE, sep=','):
+    """Iterate over DataFrame chunks of a CSV/TSV path or file object."""
+    # TSV dumps follow Restaurant_Reviews.tsv: no quoting, so stray quotes in reviews are kept
+    quoting = csv.QUOTE_NONE if sep == '\t' else csv.QUOTE_MINIMAL
+    return pd.read_csv(source, sep=sep, quoting=quoting, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+
+def score_chunks(chunks, text_column, model, vectorizer, preprocessor, timer=None):
+    """Yield each chunk with prediction, sentiment and positive_probability columns added."""
+    positive_index = list(model.classes_).index(1)
+    for chunk in chunks:
+        if text_column not in chunk.columns:
+            raise KeyError(f"Column '{text_column}' not found; available: {', '.join(chunk.columns)}")
+        predictions, probabilities = score_texts(chunk[text_column].tolist(), model, vectorizer, preprocessor, timer)
+        chunk['prediction'] = predictions.astype(int)
+        chunk['sentiment'] = np.where(predictions == 1, 'Positive', 'Negative')
+        chunk['positive_probability'] = probabilities[:, positive_index].round(4)
+        yield chunk
+
+
+def load_artifacts(model_path, vectorizer_path, artifact_path=None):
+    if artifact_path:
+        from linear_artifact import LinearScorer
+        scorer = LinearScorer(artifact_path)
+        return scorer, scorer
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    with open(vectorizer_path, 'rb') as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or TSV file of reviews')
+    parser.add_argument('-o', '--output', help='where to write scored rows (default: <input>_scored.csv)')
+    parser.add_argument('--text-column', default='Review')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='reviews per chunk')
+    parser.add_argument('--sep', help='input separator (default: tab for .tsv/.txt, comma otherwise)')
+    parser.add_argument('--model', default=os.path.join(HERE, 'best_model.pkl'))
+    parser.add_argument('--vectorizer', default=os.path.join(HERE, 'vectorizer.pkl'))
+    parser.add_argument('--artifact', help='exported model directory (linear_artifact.py); replaces --model/--vectorizer')
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + '_scored.csv'
+    sep = args.sep or detect_separator(args.input)
+    model, vectorizer = load_artifacts(args.model, args.vectorizer, args.artifact)
+    preprocessor = Preprocessor()
+
+    started = time.perf_counter()
+    timer = StageTimer()
+    rows = positives = 0
+    with open(output, 'w', newline='', encoding='utf-8') as out:
+        chunks = score_chunks(read_reviews(args.input, args.chunksize, sep), args.text_column,
+                              model, vectorizer, preprocessor, timer)
+        for chunk in chunks:
+            chunk.to_csv(out, header=rows == 0, index=False)
+            out.flush()
+            rows += len(chunk)
+            positives += int((chunk['prediction'] == 1).sum())
+            elapsed = time.perf_counter() - started
+            print(f'\r{rows:,} reviews  {rows / elapsed:,.0f} reviews/s', end='', file=sys.stderr)
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    print(f'Scored {rows:,} reviews in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} reviews/s); '
+          f'{positives / max(rows, 1):.1%} positive -> {output}')
+    print('  ' + '  '.join(f'{stage} {timer.stages.get(stage, 0.0):.2f}s' for stage in STAGES if stage in timer.stages)
+          + f'  io {elapsed - timer.total:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
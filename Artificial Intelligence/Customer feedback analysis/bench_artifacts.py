@@ -0,0 +1,107 @@
+"""Cold start and per-request latency: pickled scikit-learn model vs the NumPy artifact.
+
+    python linear_artifact.py --out model_artifact
+    python bench_artifacts.py --artifact model_artifact
+
+Cold start is measured in fresh interpreter processes, from before the first
+import to the first prediction. Per-request latency scores one cleaned review
+at a time, as the app does. The script also checks how closely the two paths
+agree on every review in the dataset.
+"""
+import argparse
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from linear_artifact import LinearScorer
+from preprocessing import Preprocessor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+COLD_START = {
+    "pickle": (
+        "import time; t = time.perf_counter(); import pickle\n"
+        "model = pickle.load(open({model!r}, 'rb')); vectorizer = pickle.load(open({vectorizer!r}, 'rb'))\n"
+        "model.predict_proba(vectorizer.transform(['great food']))\n"
+        "print(time.perf_counter() - t)"
+    ),
+    "artifact": (
+        "import time; t = time.perf_counter(); import sys; sys.path.insert(0, {here!r})\n"
+        "from linear_artifact import LinearScorer\n"
+        "scorer = LinearScorer({artifact!r}); scorer.predict_proba(scorer.transform(['great food']))\n"
+        "print(time.perf_counter() - t)"
+    ),
+}
+
+
+def cold_start(kind, runs, **paths):
+    code = COLD_START[kind].format(here=HERE, **paths)
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, check=True)
+        timings.append(float(output.stdout.strip()))
+    return statistics.median(timings)
+
+
+def latency(score, texts):
+    timings = []
+    for text in texts:
+        started = time.perf_counter()
+        score(text)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="best_model.pkl")
+    parser.add_argument("--vectorizer", default="vectorizer.pkl")
+    parser.add_argument("--artifact", default="model_artifact")
+    parser.add_argument("--data", default=os.path.join(HERE, "Restaurant_Reviews.tsv"))
+    parser.add_argument("--runs", type=int, default=5, help="cold-start processes per path")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    paths = {"model": os.path.abspath(args.model), "vectorizer": os.path.abspath(args.vectorizer),
+             "artifact": os.path.abspath(args.artifact)}
+    pickle_size = os.path.getsize(paths["model"]) + os.path.getsize(paths["vectorizer"])
+    artifact_size = sum(os.path.getsize(os.path.join(paths["artifact"], n)) for n in os.listdir(paths["artifact"]))
+    print(f"on disk: pickle {pickle_size / 1024:,.1f} KB   artifact {artifact_size / 1024:,.1f} KB")
+
+    pickle_cold = cold_start("pickle", args.runs, **paths)
+    artifact_cold = cold_start("artifact", args.runs, **paths)
+    print(f"cold start (median of {args.runs}): pickle {pickle_cold * 1000:7.1f} ms   "
+          f"artifact {artifact_cold * 1000:7.1f} ms   ({pickle_cold / artifact_cold:.1f}x)")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(paths["model"], "rb") as f:
+            model = pickle.load(f)
+        with open(paths["vectorizer"], "rb") as f:
+            vectorizer = pickle.load(f)
+    scorer = LinearScorer(paths["artifact"])
+
+    reviews = pd.read_csv(args.data, delimiter="\t", quoting=3, dtype=str, keep_default_na=False)["Review"].tolist()
+    cleaned = Preprocessor().clean_batch(reviews)
+    sample = (cleaned * (args.requests // len(cleaned) + 1))[:args.requests]
+    p50, p95 = latency(lambda text: model.predict_proba(vectorizer.transform([text])), sample)
+    a50, a95 = latency(lambda text: scorer.predict_proba(scorer.transform([text])), sample)
+    print(f"per request ({args.requests:,} single reviews): pickle p50 {p50:.3f} ms p95 {p95:.3f} ms   "
+          f"artifact p50 {a50:.3f} ms p95 {a95:.3f} ms   ({p50 / a50:.1f}x at p50)")
+
+    expected = model.predict_proba(vectorizer.transform(cleaned))
+    actual = scorer.predict_proba(scorer.transform(cleaned))
+    agreement = (expected.argmax(axis=1) == actual.argmax(axis=1)).mean()
+    print(f"agreement on {len(cleaned):,} reviews: labels {agreement:.2%}, "
+          f"max |probability difference| {np.abs(expected - actual).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark review preprocessing on Restaurant_Reviews.tsv scaled up.
+
+Compares three implementations on the same reviews and checks that they
+produce identical output:
+
+- the old training loop in model.py (new PorterStemmer per review,
+  stopword set rebuilt per word), timed on the unscaled file only because
+  it is far too slow for the scaled one;
+- the old per-review preprocess_text from app.py;
+- preprocessing.Preprocessor.clean_batch (precompiled regex + LRU stem cache).
+
+    python bench_preprocessing.py --scale 100
+"""
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.stem.porter import PorterStemmer
+
+from preprocessing import Preprocessor, load_stopwords
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def legacy_training_loop(reviews):
+    corpus = []
+    for review in reviews:
+        review = re.sub('[^a-zA-Z]', ' ', review)
+        review = review.lower().split()
+        ps = PorterStemmer()
+        review = [ps.stem(word) for word in review if word not in set(stopwords.words('english'))]
+        corpus.append(' '.join(review))
+    return corpus
+
+
+def legacy_preprocess_text(text, ps, stopwords_set):
+    review = re.sub('[^a-zA-Z]', ' ', text)
+    review = review.lower().split()
+    review = [ps.stem(word) for word in review if word not in stopwords_set]
+    return ' '.join(review)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(HERE, 'Restaurant_Reviews.tsv'))
+    parser.add_argument('--scale', type=int, default=100, help='how many copies of the dataset to process')
+    args = parser.parse_args()
+
+    reviews = pd.read_csv(args.data, delimiter='\t', quoting=3, dtype=str, keep_default_na=False)['Review'].tolist()
+    scaled = reviews * args.scale
+    stopwords_set = load_stopwords()
+    print(f'{len(reviews):,} reviews x {args.scale} = {len(scaled):,}')
+
+    legacy_small, seconds = timed(lambda: legacy_training_loop(reviews))
+    print(f"  model.py loop (old, 1x)     : {seconds:7.2f}s  {len(reviews) / seconds:>10,.0f} reviews/s")
+
+    ps = PorterStemmer()
+    legacy, legacy_seconds = timed(lambda: [legacy_preprocess_text(text, ps, stopwords_set) for text in scaled])
+    print(f"  preprocess_text (old)       : {legacy_seconds:7.2f}s  {len(scaled) / legacy_seconds:>10,.0f} reviews/s")
+
+    preprocessor = Preprocessor(stopwords_set)
+    batch, batch_seconds = timed(lambda: preprocessor.clean_batch(scaled))
+    info = preprocessor.cache_info()
+    print(f"  Preprocessor.clean_batch    : {batch_seconds:7.2f}s  {len(scaled) / batch_seconds:>10,.0f} reviews/s"
+          f"  ({legacy_seconds / batch_seconds:.1f}x; stem cache {info.currsize:,} entries, "
+          f"{info.hits / max(info.hits + info.misses, 1):.2%} hits)")
+
+    if batch != legacy or batch[:len(reviews)] != legacy_small:
+        raise SystemExit('FAILED: outputs differ from the original preprocessing')
+    print('outputs identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Compact, pickle-free artifacts for the linear review classifiers.
+
+    python linear_artifact.py --model best_model.pkl --vectorizer vectorizer.pkl --out model_artifact
+
+An artifact is a directory of plain files:
+
+    manifest.json   model kind, classes, link function, tokenizer settings
+    vocab.txt       one term per line; line i is feature column i
+    idf.npy         float64[n_features]
+    weights.npy     float64[n_features, k]  (k = 1 for logistic/Platt, n_classes for softmax)
+    bias.npy        float64[k]
+
+LinearScorer reads nothing until the first call. It then memory-maps the
+.npy files and builds the term -> column dict from vocab.txt. Scoring is
+TF-IDF weighting, L2 normalisation and one weighted sum per document, all in
+NumPy. Neither scikit-learn nor pickle is needed at serving time, and the
+files do not depend on library versions.
+
+Supported: a TfidfVectorizer over single words, paired with
+LogisticRegression (exact), MultinomialNB (exact) or SVC(kernel='linear')
+fitted with probability=True. For SVC, probabilities use Platt's sigmoid on
+the decision value. libsvm passes that sigmoid through an iterative
+pairwise-coupling solver, which stops at a tolerance of 0.0025. On the
+sample data the artifact's probabilities therefore differ from
+SVC.predict_proba by up to 0.005. The predicted labels differ only for
+reviews that sit within that distance of 0.5 (1 of 3,216).
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+# Export
+def _dense(array):
+    return np.asarray(array.toarray() if hasattr(array, "toarray") else array, dtype=np.float64)
+
+
+def _linear_parameters(model):
+    kind = type(model).__name__
+    if kind == "LogisticRegression":
+        if len(model.classes_) != 2:
+            raise ValueError("only binary LogisticRegression can be exported")
+        return "logistic", _dense(model.coef_).T, _dense(model.intercept_), {}
+    if kind == "MultinomialNB":
+        return "softmax", np.asarray(model.feature_log_prob_, dtype=np.float64).T, np.asarray(model.class_log_prior_, dtype=np.float64), {}
+    if kind == "SVC":
+        if model.kernel != "linear" or len(model.classes_) != 2:
+            raise ValueError("only binary SVC(kernel='linear') can be exported")
+        if not getattr(model, "probability", False):
+            raise ValueError("SVC must be fitted with probability=True")
+        return "platt", _dense(model.coef_).T, _dense(model.intercept_), {"platt_a": float(model.probA_[0]), "platt_b": float(model.probB_[0])}
+    raise ValueError(f"{kind} is not a supported linear model (LogisticRegression, MultinomialNB, linear SVC)")
+
+
+def _vectorizer_settings(vectorizer):
+    if type(vectorizer).__name__ != "TfidfVectorizer":
+        raise ValueError(f"only TfidfVectorizer can be exported, not {type(vectorizer).__name__}")
+    if vectorizer.analyzer != "word" or tuple(vectorizer.ngram_range) != (1, 1) or callable(vectorizer.tokenizer) \
+            or callable(vectorizer.preprocessor) or vectorizer.stop_words is not None or vectorizer.strip_accents:
+        raise ValueError("only single-word TF-IDF with the default tokenizer can be exported")
+    return {
+        "token_pattern": vectorizer.token_pattern,
+        "lowercase": bool(vectorizer.lowercase),
+        "binary": bool(vectorizer.binary),
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "use_idf": bool(vectorizer.use_idf),
+        "norm": vectorizer.norm,
+    }
+
+
+def export_linear_model(model, vectorizer, out_dir):
+    """Write ``model`` + ``vectorizer`` as an artifact directory; returns the manifest."""
+    settings = _vectorizer_settings(vectorizer)
+    link, weights, bias, extra = _linear_parameters(model)
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    if any("\n" in term for term in terms):
+        raise ValueError("vocabulary terms must not contain newlines")
+    idf = np.asarray(vectorizer.idf_ if settings["use_idf"] else np.ones(len(terms)), dtype=np.float64)
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(terms))
+    np.save(os.path.join(out_dir, "idf.npy"), idf)
+    np.save(os.path.join(out_dir, "weights.npy"), np.ascontiguousarray(weights))
+    np.save(os.path.join(out_dir, "bias.npy"), bias.reshape(-1))
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model": type(model).__name__,
+        "classes": [int(c) for c in model.classes_],
+        "link": link,
+        "n_features": len(terms),
+        "vectorizer": settings,
+        **extra,
+    }
+    # The manifest goes last, so a reader never sees a half-written artifact as complete
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# Scoring
+class LinearScorer:
+    """Pure-NumPy scorer for an exported artifact; drop-in for both the vectorizer and the model.
+
+    ``transform(texts)`` returns an opaque feature batch and
+    ``predict_proba(features)`` the class probabilities, so existing code
+    written as ``model.predict_proba(vectorizer.transform(texts))`` works
+    with the same object in both roles.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported artifact format {self.manifest.get('format_version')}")
+        self.classes_ = np.asarray(self.manifest["classes"])
+        self._loaded = False
+
+    def _load(self):
+        settings = self.manifest["vectorizer"]
+        self._token_pattern = re.compile(settings["token_pattern"])
+        with open(os.path.join(self.path, "vocab.txt"), encoding="utf-8") as f:
+            terms = f.read().split("\n")
+        self._vocabulary = dict(zip(terms, range(len(terms))))
+        self._idf = np.load(os.path.join(self.path, "idf.npy"), mmap_mode="r")
+        self._weights = np.load(os.path.join(self.path, "weights.npy"), mmap_mode="r")
+        self._bias = np.load(os.path.join(self.path, "bias.npy"))
+        self._loaded = True
+
+    def transform(self, texts):
+        """(doc index, column, tf-idf value) triples for known terms, L2-normalised per document."""
+        if not self._loaded:
+            self._load()
+        settings = self.manifest["vectorizer"]
+        vocabulary = self._vocabulary
+        findall = self._token_pattern.findall
+        lowercase = settings["lowercase"]
+        docs, columns = [], []
+        for i, text in enumerate(texts):
+            for token in findall(text.lower() if lowercase else text):
+                column = vocabulary.get(token)
+                if column is not None:
+                    docs.append(i)
+                    columns.append(column)
+        n_docs = len(texts)
+        if not columns:
+            return n_docs, np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+
+        # Collapse repeated (doc, column) pairs into term counts
+        keys = np.asarray(docs, dtype=np.int64) * len(vocabulary) + np.asarray(columns, dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        docs, columns = np.divmod(keys, len(vocabulary))
+        tf = counts.astype(np.float64)
+        if settings["binary"]:
+            tf[:] = 1.0
+        elif settings["sublinear_tf"]:
+            tf = np.log(tf) + 1.0
+        values = tf * self._idf[columns]
+        if settings["norm"] == "l2":
+            norms = np.sqrt(np.bincount(docs, weights=values * values, minlength=n_docs))
+            values /= norms[docs]
+        elif settings["norm"] == "l1":
+            values /= np.bincount(docs, weights=np.abs(values), minlength=n_docs)[docs]
+        return n_docs, docs, columns, values
+
+    def decision_function(self, features):
+        n_docs, docs, columns, values = features
+        weights = self._weights
+        scores = np.tile(self._bias, (n_docs, 1))
+        for k in range(weights.shape[1]):
+            scores[:, k] += np.bincount(docs, weights=values * weights[columns, k], minlength=n_docs)
+        return scores
+
+    def predict_proba(self, features):
+        scores = self.decision_function(features)
+        link = self.manifest["link"]
+        if link == "softmax":
+            scores -= scores.max(axis=1, keepdims=True)
+            exp = np.exp(scores)
+            return exp / exp.sum(axis=1, keepdims=True)
+        if link == "platt":
+            # libsvm fits the sigmoid on its own decision value, which scikit-learn negates for binary SVC;
+            # the sigmoid then gives the probability of classes_[0]
+            negative = 1.0 / (1.0 + np.exp(-self.manifest["platt_a"] * scores[:, 0] + self.manifest["platt_b"]))
+            positive = 1.0 - negative
+        else:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, features):
+        return self.classes_[self.predict_proba(features).argmax(axis=1)]
+
+
+def main():
+    import pickle
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="best_model.pkl")
+    parser.add_argument("--vectorizer", default="vectorizer.pkl")
+    parser.add_argument("--out", default="model_artifact")
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        model = pickle.load(f)
+    with open(args.vectorizer, "rb") as f:
+        vectorizer = pickle.load(f)
+    manifest = export_linear_model(model, vectorizer, args.out)
+    size = sum(os.path.getsize(os.path.join(args.out, name)) for name in os.listdir(args.out))
+    print(f"Exported {manifest['model']} ({manifest['n_features']:,} features, {manifest['link']} link) "
+          f"to {args.out}/ ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
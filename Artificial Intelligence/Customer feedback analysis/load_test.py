@@ -0,0 +1,140 @@
+"""Load generator for serve.py: per-request scoring vs micro-batching.
+
+    python load_test.py --concurrency 1 8 32 --requests 2000 --window-ms 3
+
+For each mode (--window-ms 0, then the given window), a serve.py process is
+started on a free port. Then each concurrency level runs with that many
+client threads. Every thread keeps one HTTP/1.1 connection open and sends
+single-review POST /predict requests, drawn from Restaurant_Reviews.tsv,
+back to back. The script reports throughput, client-side p50/p95 latency,
+and the server's mean batch size. Use --url to test an already running server
+instead.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return health(url)
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"server at {url} did not come up within {timeout}s")
+
+
+def health(url):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+    try:
+        conn.request("GET", "/health")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def run_load(url, reviews, concurrency, requests):
+    """Send ``requests`` single-review requests from ``concurrency`` threads; returns (seconds, latencies_ms)."""
+    parts = urlsplit(url)
+    latencies = []
+    lock = threading.Lock()
+    per_thread = requests // concurrency
+    start = threading.Barrier(concurrency + 1)
+
+    def client(offset):
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        # bytes, so http.client sends headers and body in one write
+        bodies = [json.dumps({"review": reviews[(offset + i) % len(reviews)]}).encode() for i in range(per_thread)]
+        timings = []
+        start.wait()
+        for body in bodies:
+            started = time.perf_counter()
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            timings.append((time.perf_counter() - started) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(timings)
+
+    threads = [threading.Thread(target=client, args=(i * per_thread,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--window-ms", type=float, default=3.0, help="batching window of the micro-batched run")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--data", default=os.path.join(HERE, "Restaurant_Reviews.tsv"))
+    parser.add_argument("--url", help="load-test this running server instead of starting serve.py")
+    args = parser.parse_args()
+
+    reviews = pd.read_csv(args.data, delimiter="\t", quoting=3, dtype=str, keep_default_na=False)["Review"].tolist()
+    reviews = [review for review in reviews if review.strip()]
+
+    modes = [("given", args.url)] if args.url else [("per-request", 0.0), ("micro-batched", args.window_ms)]
+    throughput = {}
+    for mode, setting in modes:
+        server = None
+        url = setting if args.url else None
+        if not args.url:
+            port = free_port()
+            url = f"http://127.0.0.1:{port}"
+            server = subprocess.Popen([sys.executable, "-W", "ignore", os.path.join(HERE, "serve.py"), "--port", str(port),
+                                       "--window-ms", str(setting), "--max-batch", str(args.max_batch)],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            info = wait_until_ready(url)
+            print(f"{mode}: {info['model']}" + (f", {setting:g} ms window" if setting else ""))
+            for concurrency in args.concurrency:
+                before = health(url).get("batching", {})
+                seconds, latencies = run_load(url, reviews, concurrency, args.requests)
+                after = health(url).get("batching", {})
+                rate = len(latencies) / seconds
+                throughput[mode, concurrency] = rate
+                batches = after.get("batches", 0) - before.get("batches", 0)
+                batch_note = f"  mean batch {len(latencies) / batches:5.1f}" if batches else ""
+                print(f"  concurrency {concurrency:>3}: {rate:8,.0f} req/s  p50 {np.percentile(latencies, 50):6.2f} ms  "
+                      f"p95 {np.percentile(latencies, 95):6.2f} ms{batch_note}")
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    if not args.url:
+        print("micro-batched / per-request throughput: " + "  ".join(
+            f"c={c}: {throughput['micro-batched', c] / throughput['per-request', c]:.2f}x" for c in args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
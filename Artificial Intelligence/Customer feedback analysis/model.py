@@ -1,67 +1,124 @@
+import argparse
+import pickle
+import sys
+
 import pandas as pd
-import numpy as np
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem.porter import PorterStemmer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
 from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
 from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.tree import DecisionTreeClassifier
-import pickle
+from batch_score import model_input
+from preprocessing import Preprocessor
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+N_HASH_FEATURES = 2 ** 18
+
 
-# Load dataset
-dataset = pd.read_csv("Restaurant_Reviews.tsv", delimiter="\t", quoting=3)
+# Load dataset, keeping only rows with a 0/1 label
+def load_dataset(path):
+    dataset = pd.read_csv(path, delimiter="\t", quoting=3, dtype=str, keep_default_na=False)
+    labelled = dataset[dataset['Liked'].isin(['0', '1'])].copy()
+    if len(labelled) < len(dataset):
+        print(f"Skipped {len(dataset) - len(labelled)} rows without a 0/1 label")
+    labelled['Liked'] = labelled['Liked'].astype(int)
+    return labelled
 
-# Text cleaning
-nltk.download('stopwords')
-corpus = []
-for review in dataset['Review']:
-    review = re.sub('[^a-zA-Z]', ' ', review)
-    review = review.lower().split()
-    ps = PorterStemmer()
-    review = [ps.stem(word) for word in review if word not in set(stopwords.words('english'))]
-    corpus.append(' '.join(review))
 
-# Feature extraction
-vectorizer = TfidfVectorizer()
-X = vectorizer.fit_transform(corpus).toarray()
-y = dataset['Liked']
+# Feature extraction; both modes produce sparse CSR matrices
+def build_vectorizer(features="tfidf", n_features=N_HASH_FEATURES):
+    if features == "hashing":
+        # Fixed-width feature space: memory is bounded by n_features no matter how large the vocabulary grows.
+        # alternate_sign=False keeps values non-negative, which MultinomialNB requires.
+        return make_pipeline(HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None), TfidfTransformer())
+    return TfidfVectorizer()
 
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # Models to try
-models = {
-    'LogisticRegression': LogisticRegression(max_iter=1000),
-    'SVC': SVC(kernel='linear', probability=True),
-    'RandomForest': RandomForestClassifier(),
-    'NaiveBayes': MultinomialNB(),
-    'DecisionTree': DecisionTreeClassifier()
-}
-
-scores = {}
-fitted_models = {}
-
-for name, model in models.items():
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-    acc = accuracy_score(y_test, y_pred)
-    scores[name] = acc
-    fitted_models[name] = model
-    print(f"{name} accuracy: {acc:.4f}")
-
-# Pick the best model
-best_model_name = max(scores, key=scores.get)
-best_model = fitted_models[best_model_name]
-print(f"Best model: {best_model_name} ({scores[best_model_name]:.4f})")
-
-# Save the model and vectorizer
-with open("best_model.pkl", "wb") as f:
-    pickle.dump(best_model, f)
-with open("vectorizer.pkl", "wb") as f:
-    pickle.dump(vectorizer, f)
\ No newline at end of file
+def candidate_models():
+    return {
+        'LogisticRegression': LogisticRegression(max_iter=1000),
+        'SVC': SVC(kernel='linear', probability=True),
+        'RandomForest': RandomForestClassifier(),
+        'NaiveBayes': MultinomialNB(),
+        'DecisionTree': DecisionTreeClassifier()
+    }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KiB on Linux
+
+
+def describe_matrix(X):
+    stored = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    dense = X.shape[0] * X.shape[1] * X.dtype.itemsize
+    return (f"{X.shape[0]:,} x {X.shape[1]:,}, {X.nnz:,} non-zeros, "
+            f"{stored / 2 ** 20:.1f} MB as CSR (dense would be {dense / 2 ** 20:,.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the review sentiment models and save the best one.")
+    parser.add_argument("--data", default="Restaurant_Reviews.tsv")
+    parser.add_argument("--features", choices=["tfidf", "hashing"], default="tfidf",
+                        help="TF-IDF over a learned vocabulary, or hashed features of fixed width")
+    parser.add_argument("--n-features", type=int, default=N_HASH_FEATURES, help="width of the hashed feature space")
+    parser.add_argument("--models", nargs="+", choices=list(candidate_models()), help="train only these candidates")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.data)
+
+    # Text cleaning (same preprocessing as app.py)
+    corpus = Preprocessor().clean_batch(dataset['Review'])
+
+    vectorizer = build_vectorizer(args.features, args.n_features)
+    X = vectorizer.fit_transform(corpus).tocsr()
+    y = dataset['Liked']
+    print(f"Features ({args.features}): {describe_matrix(X)}")
+
+    # Train-test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    models = candidate_models()
+    if args.models:
+        models = {name: models[name] for name in args.models}
+
+    scores = {}
+    fitted_models = {}
+
+    for name, model in models.items():
+        model.fit(model_input(model, X_train), y_train)
+        y_pred = model.predict(model_input(model, X_test))
+        acc = accuracy_score(y_test, y_pred)
+        scores[name] = acc
+        fitted_models[name] = model
+        print(f"{name} accuracy: {acc:.4f}")
+
+    # Pick the best model
+    best_model_name = max(scores, key=scores.get)
+    best_model = fitted_models[best_model_name]
+    print(f"Best model: {best_model_name} ({scores[best_model_name]:.4f})")
+
+    # Save the model and vectorizer
+    with open("best_model.pkl", "wb") as f:
+        pickle.dump(best_model, f)
+    with open("vectorizer.pkl", "wb") as f:
+        pickle.dump(vectorizer, f)
+
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS: {peak:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Versioned model directory shared by online_train.py and the app.
+
+    models/
+        CURRENT         name of the live version, e.g. "v0007"
+        v0006/          model.pkl, vectorizer.pkl, meta.json
+        v0007/
+
+A version is written to a temporary directory and renamed into place once
+complete. Only then is CURRENT replaced, with os.replace, which is atomic.
+A reader that opens CURRENT therefore always finds a complete version. The
+trainer never modifies a published version.
+"""
+import json
+import os
+import pickle
+import re
+import shutil
+import time
+
+MODELS_DIR = "models"
+CURRENT_NAME = "CURRENT"
+VERSION_PATTERN = re.compile(r"^v(\d+)$")
+
+
+def list_versions(models_dir=MODELS_DIR):
+    if not os.path.isdir(models_dir):
+        return []
+    numbers = [int(m.group(1)) for m in map(VERSION_PATTERN.match, os.listdir(models_dir)) if m]
+    return [f"v{n:04d}" for n in sorted(numbers)]
+
+
+def current_version(models_dir=MODELS_DIR):
+    """Name of the live version, or None if nothing has been published."""
+    try:
+        with open(os.path.join(models_dir, CURRENT_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_version(version, models_dir=MODELS_DIR):
+    path = os.path.join(models_dir, version)
+    with open(os.path.join(path, "model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(path, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+
+def load_meta(version, models_dir=MODELS_DIR):
+    with open(os.path.join(models_dir, version, "meta.json")) as f:
+        return json.load(f)
+
+
+def publish(model, vectorizer, models_dir=MODELS_DIR, meta=None, keep=5):
+    """Write a new version, make it live, and prune all but the newest ``keep``; returns its name."""
+    os.makedirs(models_dir, exist_ok=True)
+    versions = list_versions(models_dir)
+    version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+
+    staging = os.path.join(models_dir, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    with open(os.path.join(staging, "model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    with open(os.path.join(staging, "vectorizer.pkl"), "wb") as f:
+        pickle.dump(vectorizer, f)
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump({"version": version, "published_at": time.time(), "model": type(model).__name__, **(meta or {})}, f, indent=2)
+    os.rename(staging, os.path.join(models_dir, version))
+
+    pointer = os.path.join(models_dir, f".{CURRENT_NAME}.tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, os.path.join(models_dir, CURRENT_NAME))
+
+    if keep:
+        for old in list_versions(models_dir)[:-keep]:
+            shutil.rmtree(os.path.join(models_dir, old), ignore_errors=True)
+    return version
@@ -0,0 +1,132 @@
+"""Incremental training: stream labelled reviews into the live model in mini-batches.
+
+    python online_train.py Restaurant_Reviews.tsv --fresh         # start a new model
+    python online_train.py new_feedback.csv --batch-size 500      # keep training the live one
+
+Features come from a HashingVectorizer. It is stateless, so new reviews never
+require re-fitting a vocabulary or IDF weights, and old and new batches share
+one feature space. The classifier (SGDClassifier with log loss, or
+MultinomialNB) is updated with partial_fit one mini-batch at a time, so
+memory stays bounded by --batch-size whatever the input size.
+
+By default, training continues from the version that is currently live in
+--models-dir. Each new model is published through model_store, every
+--publish-every batches and once at the end. The running app picks up the
+new version on its next rerun, without a restart.
+
+Accuracy is measured progressively: each batch is scored before the model
+learns from it, which gives an honest held-out estimate with no separate
+test split.
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+
+from batch_score import detect_separator, read_reviews
+from model import N_HASH_FEATURES
+from model_store import MODELS_DIR, current_version, load_meta, load_version, publish
+from preprocessing import Preprocessor
+
+CLASSES = np.array([0, 1])
+DEFAULT_BATCH_SIZE = 1000
+
+
+def online_vectorizer(n_features=N_HASH_FEATURES):
+    # Per-document L2 norm instead of TF-IDF: IDF needs corpus statistics, which would have to be refit as data arrives
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+
+
+def online_models():
+    return {
+        "sgd": SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42),
+        "nb": MultinomialNB(alpha=0.1),
+    }
+
+
+def labelled_batches(paths, text_column, label_column, batch_size):
+    """Yield (texts, labels) mini-batches from CSV/TSV files, skipping rows without a 0/1 label."""
+    for path in paths:
+        for chunk in read_reviews(path, batch_size, detect_separator(path)):
+            for column in (text_column, label_column):
+                if column not in chunk.columns:
+                    raise KeyError(f"Column '{column}' not found in {path}; available: {', '.join(chunk.columns)}")
+            chunk = chunk[chunk[label_column].isin(["0", "1"])]
+            if len(chunk):
+                yield chunk[text_column].tolist(), chunk[label_column].astype(int).to_numpy()
+
+
+def resume(models_dir):
+    """Model, vectorizer and counters of the live version, or None if it cannot be trained further."""
+    version = current_version(models_dir)
+    if version is None:
+        return None
+    model, vectorizer = load_version(version, models_dir)
+    if not hasattr(model, "partial_fit") or not isinstance(vectorizer, HashingVectorizer):
+        raise SystemExit(f"Live version {version} ({type(model).__name__}) was not trained incrementally; "
+                         f"pass --fresh to start a new model")
+    meta = load_meta(version, models_dir)
+    return version, model, vectorizer, meta.get("reviews_seen", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="CSV or TSV files of labelled reviews")
+    parser.add_argument("--text-column", default="Review")
+    parser.add_argument("--label-column", default="Liked")
+    parser.add_argument("--model", choices=list(online_models()), default="sgd", help="classifier for --fresh runs")
+    parser.add_argument("--n-features", type=int, default=N_HASH_FEATURES, help="width of the hashed feature space")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="reviews per partial_fit call")
+    parser.add_argument("--publish-every", type=int, default=10, help="publish a version every N batches (0: only at the end)")
+    parser.add_argument("--keep", type=int, default=5, help="published versions to keep on disk")
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument("--fresh", action="store_true", help="ignore the live version and train a new model")
+    args = parser.parse_args()
+
+    state = None if args.fresh else resume(args.models_dir)
+    if state:
+        base, model, vectorizer, reviews_seen = state
+        print(f"Resuming {type(model).__name__} from {base} ({reviews_seen:,} reviews seen)")
+    else:
+        base, model, vectorizer, reviews_seen = None, online_models()[args.model], online_vectorizer(args.n_features), 0
+        print(f"Training a new {type(model).__name__} on {vectorizer.n_features:,} hashed features")
+
+    preprocessor = Preprocessor()
+    trained = hasattr(model, "classes_")
+    started = time.perf_counter()
+    batches = rows = correct = scored = 0
+
+    def publish_now():
+        meta = {"base_version": base, "reviews_seen": reviews_seen,
+                "progressive_accuracy": correct / scored if scored else None}
+        version = publish(model, vectorizer, args.models_dir, meta, args.keep)
+        accuracy = f", progressive accuracy {correct / scored:.4f}" if scored else ""
+        print(f"  published {version}: {reviews_seen:,} reviews seen{accuracy}")
+
+    for texts, labels in labelled_batches(args.inputs, args.text_column, args.label_column, args.batch_size):
+        X = vectorizer.transform(preprocessor.clean_batch(texts))
+        if trained:
+            # Test-then-train: score the batch before learning from it
+            correct += int((model.predict(X) == labels).sum())
+            scored += len(labels)
+        model.partial_fit(X, labels, classes=CLASSES)
+        trained = True
+        batches += 1
+        rows += len(labels)
+        reviews_seen += len(labels)
+        if args.publish_every and batches % args.publish_every == 0:
+            publish_now()
+
+    if not batches:
+        raise SystemExit("No labelled reviews found; nothing was published")
+    if not args.publish_every or batches % args.publish_every:
+        publish_now()
+    seconds = time.perf_counter() - started
+    print(f"Trained on {rows:,} reviews in {batches:,} batches in {seconds:.2f}s ({rows / seconds:,.0f} reviews/s)")
+
+
+if __name__ == "__main__":
+    main()
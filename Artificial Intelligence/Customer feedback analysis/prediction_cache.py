@@ -0,0 +1,53 @@
+"""Bounded LRU cache of predictions, keyed on cleaned review text.
+
+The key is the output of Preprocessor.clean (letters only, lowercased,
+stopwords dropped, stemmed). "Great food!!" and "great food" therefore
+share one entry: the model would see the same input for both. A cache
+belongs to one model. The app creates one per model version, so a newly
+published version starts empty instead of serving stale predictions.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+PREDICTION_CACHE_SIZE = 10000
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class PredictionCache:
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # shared by every Streamlit session
+        self.hits = self.misses = 0
+
+    def get_many(self, keys):
+        """Cached (prediction, probabilities) per key, None for misses; hits become most recently used."""
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(entry)
+        return results
+
+    def put_many(self, items):
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
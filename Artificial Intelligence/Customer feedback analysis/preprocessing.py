@@ -0,0 +1,75 @@
+"""Review text cleaning shared by training (model.py) and serving (app.py, batch_score.py).
+
+Produces exactly what the original per-review code did: keep ASCII letters,
+lowercase, drop English stopwords, Porter-stem the rest. It just avoids
+redoing work:
+
+- the token regex is compiled once;
+- each distinct token goes through lowercase + stopword check + stem once,
+  and the result is kept in a bounded LRU cache (restaurant reviews reuse a
+  small vocabulary, so the cache hit rate is very high);
+- clean_batch() processes a list of reviews with the lookups bound locally.
+"""
+import re
+from functools import lru_cache
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem.porter import PorterStemmer
+
+TOKEN_PATTERN = re.compile('[a-zA-Z]+')
+STEM_CACHE_SIZE = 100000
+
+
+def load_stopwords():
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+    return set(stopwords.words('english'))
+
+
+class Preprocessor:
+    def __init__(self, stopwords_set=None, stem_cache_size=STEM_CACHE_SIZE):
+        self.stopwords = frozenset(load_stopwords() if stopwords_set is None else stopwords_set)
+        self.stemmer = PorterStemmer()
+        # token as written -> stemmed lowercase form, or '' for a stopword
+        self.normalize_token = lru_cache(maxsize=stem_cache_size)(self._normalize_token)
+
+    def _normalize_token(self, token):
+        word = token.lower()
+        if word in self.stopwords:
+            return ''
+        return self.stemmer.stem(word)
+
+    def clean(self, text):
+        normalize = self.normalize_token
+        return ' '.join(stem for stem in map(normalize, TOKEN_PATTERN.findall(text)) if stem)
+
+    def clean_batch(self, texts):
+        findall = TOKEN_PATTERN.findall
+        normalize = self.normalize_token
+        join = ' '.join
+        return [join(stem for stem in map(normalize, findall(text)) if stem) for text in texts]
+
+    def cache_info(self):
+        return self.normalize_token.cache_info()
+
+
+_default = None
+
+
+def default_preprocessor():
+    """Process-wide Preprocessor, created on first use."""
+    global _default
+    if _default is None:
+        _default = Preprocessor()
+    return _default
+
+
+def preprocess_text(text):
+    return default_preprocessor().clean(text)
+
+
+def preprocess_batch(texts):
+    return default_preprocessor().clean_batch(texts)
@@ -0,0 +1,165 @@
+"""Cross-validated, parallel model selection for the review classifier.
+
+    python select_model.py --folds 5 --jobs -1
+
+1. Reviews are cleaned once. The cleaned texts are cached on disk
+   (joblib.Memory, keyed on the review texts), so re-runs reuse them.
+2. Each fold is vectorized once, with a vectorizer fitted on its training
+   part only, so vocabulary and IDF weights never see the reviews the fold
+   is scored on. Every (candidate, fold) pair is then a separate joblib
+   task over --jobs worker processes, and all candidates share the fold's
+   matrices.
+3. Each candidate is refitted on the training split, with a vectorizer fitted
+   on that split alone, and its serving cost is measured sequentially:
+   single-review predict_proba latency (p50/p95), plus the pickled size.
+4. The winner is the fastest candidate whose mean CV accuracy is within
+   --tolerance of the best. A model that is slower without being measurably
+   more accurate does not get picked.
+
+The leaderboard is written to leaderboard.csv, and the winner is saved as
+best_model.pkl + vectorizer.pkl for the app.
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from batch_score import model_input
+from model import build_vectorizer, candidate_models, load_dataset, peak_rss_mb, N_HASH_FEATURES
+from preprocessing import Preprocessor
+
+LATENCY_SAMPLES = 200
+
+
+def clean_reviews(reviews):
+    return np.array(Preprocessor().clean_batch(reviews), dtype=object)
+
+
+def vectorize(train_texts, test_texts, features, n_features):
+    """Fit a fresh vectorizer on ``train_texts`` only and transform both sides with it."""
+    vectorizer = build_vectorizer(features, n_features)
+    X_train = vectorizer.fit_transform(train_texts).tocsr()
+    return vectorizer, X_train, vectorizer.transform(test_texts).tocsr()
+
+
+def vectorize_fold(texts, train_index, test_index, features, n_features):
+    _, X_train, X_test = vectorize(texts[train_index], texts[test_index], features, n_features)
+    return X_train, X_test
+
+
+def fit_and_score(name, model, X_train, y_train, X_test, y_test):
+    started = time.perf_counter()
+    model.fit(model_input(model, X_train), y_train)
+    fit_seconds = time.perf_counter() - started
+    y_pred = model.predict(model_input(model, X_test))
+    return name, fit_seconds, accuracy_score(y_test, y_pred), f1_score(y_test, y_pred)
+
+
+def single_review_latency(model, X, samples=LATENCY_SAMPLES):
+    """p50/p95 milliseconds of predict_proba on one review at a time, as the app calls it."""
+    rows = [X[i] for i in range(min(samples, X.shape[0]))]
+    model.predict_proba(model_input(model, rows[0]))  # warm up
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        model.predict_proba(model_input(model, row))
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="Restaurant_Reviews.tsv")
+    parser.add_argument("--features", choices=["tfidf", "hashing"], default="tfidf")
+    parser.add_argument("--n-features", type=int, default=N_HASH_FEATURES)
+    parser.add_argument("--models", nargs="+", choices=list(candidate_models()))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes (-1: one per core)")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="accuracy a cheaper model may give up against the most accurate one")
+    parser.add_argument("--cache-dir", default=".feature_cache")
+    parser.add_argument("--leaderboard", default="leaderboard.csv")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    dataset = load_dataset(args.data)
+    memory = Memory(args.cache_dir, verbose=0)
+    texts = memory.cache(clean_reviews)(dataset['Review'].tolist())
+    y = dataset['Liked'].to_numpy()
+    print(f"Reviews cleaned in {time.perf_counter() - started:.2f}s: {len(texts):,} (cache: {args.cache_dir})")
+
+    # Held-out split for the final fit and latency measurement; CV runs on the training part only
+    texts_train, texts_test, y_train, y_test = train_test_split(texts, y, test_size=0.2, random_state=42, stratify=y)
+    vectorizer, X_train, X_test = vectorize(texts_train, texts_test, args.features, args.n_features)
+    print(f"Training features: {X_train.shape[0]:,} x {X_train.shape[1]:,}")
+
+    models = candidate_models()
+    if args.models:
+        models = {name: models[name] for name in args.models}
+    folds = list(StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42).split(texts_train, y_train))
+
+    started = time.perf_counter()
+    with Parallel(n_jobs=args.jobs) as parallel:
+        fold_features = parallel(
+            delayed(vectorize_fold)(texts_train, train_index, test_index, args.features, args.n_features)
+            for train_index, test_index in folds
+        )
+        print(f"Vectorized {args.folds} folds in {time.perf_counter() - started:.2f}s")
+        results = parallel(
+            delayed(fit_and_score)(name, clone(model), X_fold_train, y_train[train_index],
+                                   X_fold_test, y_train[test_index])
+            for name, model in models.items()
+            for (train_index, test_index), (X_fold_train, X_fold_test) in zip(folds, fold_features)
+        )
+    print(f"Cross-validated {len(models)} models x {args.folds} folds in {time.perf_counter() - started:.2f}s")
+
+    rows = []
+    fitted = {}
+    for name, model in models.items():
+        fold_results = [r for r in results if r[0] == name]
+        model = clone(model)
+        model.fit(model_input(model, X_train), y_train)
+        fitted[name] = model
+        p50, p95 = single_review_latency(model, X_test)
+        rows.append({
+            "model": name,
+            "cv_accuracy": np.mean([r[2] for r in fold_results]),
+            "cv_accuracy_std": np.std([r[2] for r in fold_results]),
+            "cv_f1": np.mean([r[3] for r in fold_results]),
+            "holdout_accuracy": accuracy_score(y_test, model.predict(model_input(model, X_test))),
+            "fit_seconds": np.mean([r[1] for r in fold_results]),
+            "predict_p50_ms": p50,
+            "predict_p95_ms": p95,
+            "size_kb": len(pickle.dumps(model)) / 1024,
+        })
+
+    leaderboard = pd.DataFrame(rows).sort_values("cv_accuracy", ascending=False).reset_index(drop=True)
+    best_accuracy = leaderboard["cv_accuracy"].max()
+    contenders = leaderboard[leaderboard["cv_accuracy"] >= best_accuracy - args.tolerance]
+    winner = contenders.sort_values("predict_p50_ms").iloc[0]["model"]
+    leaderboard["selected"] = leaderboard["model"] == winner
+    leaderboard.to_csv(args.leaderboard, index=False, float_format="%.4f")
+
+    with pd.option_context("display.width", 160, "display.float_format", "{:.4f}".format):
+        print(leaderboard.to_string(index=False))
+    print(f"Selected {winner}: fastest within {args.tolerance:.3f} of the best CV accuracy -> {args.leaderboard}")
+
+    # Save the model and vectorizer
+    with open("best_model.pkl", "wb") as f:
+        pickle.dump(fitted[winner], f)
+    with open("vectorizer.pkl", "wb") as f:
+        pickle.dump(vectorizer, f)
+
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS (main process): {peak:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""HTTP scoring service for the review sentiment model, with request micro-batching.
+
+    python serve.py --port 8502 --window-ms 3
+
+    POST /predict   {"review": "Great food!"}          -> {"prediction": 1, "sentiment": "Positive", ...}
+                    {"reviews": ["...", "..."]}         -> {"results": [...]}   (at most 1000 reviews)
+    GET  /health                                        -> {"status": "ok", "model": ..., "version": ...}
+
+Concurrent single-review requests are coalesced. The first request to
+arrive opens a window of --window-ms. Every request that arrives before the
+window closes, up to --max-batch, joins it. The whole batch then goes
+through one clean_batch, one transform and one predict_proba call (see
+batch_score.score_texts). Per-request overhead in scikit-learn (input
+validation, sparse matrix construction) is paid once per batch instead of
+once per request. --window-ms 0 disables batching: each handler thread
+scores its own request, which is the baseline load_test.py compares against.
+
+Models are resolved like the app: a version published by online_train.py,
+then model_artifact/, then best_model.pkl + vectorizer.pkl. A newly
+published version is picked up between batches, without a restart.
+
+Only the standard library is used for HTTP, so there is nothing extra to install.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_score import load_artifacts, score_texts
+from linear_artifact import MANIFEST_NAME
+from model_store import MODELS_DIR, current_version, load_version
+from preprocessing import Preprocessor
+from timing import LatencyWindow, StageTimer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WINDOW_MS = 3.0
+DEFAULT_MAX_BATCH = 64
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH_REVIEWS = 1000
+
+logger = logging.getLogger("review_analyzer.serve")
+
+
+class ModelHolder:
+    """Current (model, vectorizer) pair, reloaded when online_train.py publishes a new version."""
+
+    def __init__(self, models_dir, artifact, model_path, vectorizer_path):
+        self.models_dir = models_dir
+        self.version = current_version(models_dir)
+        if self.version:
+            self.model, self.vectorizer = load_version(self.version, models_dir)
+        elif os.path.exists(os.path.join(artifact, MANIFEST_NAME)):
+            self.model, self.vectorizer = load_artifacts(None, None, artifact)
+        else:
+            self.model, self.vectorizer = load_artifacts(model_path, vectorizer_path)
+
+    def get(self):
+        version = current_version(self.models_dir)
+        if version and version != self.version:
+            self.model, self.vectorizer = load_version(version, self.models_dir)
+            self.version = version
+            logger.info("switched to model version %s", version)
+        return self.model, self.vectorizer
+
+
+class Scorer:
+    def __init__(self, holder, preprocessor, latency=None):
+        self.holder = holder
+        self.preprocessor = preprocessor
+        self.latency = latency or LatencyWindow()
+        self.lock = threading.Lock()  # serializes model reloads
+
+    def __call__(self, texts, source="batch"):
+        with self.lock:
+            model, vectorizer = self.holder.get()
+        timer = StageTimer()
+        predictions, probabilities = score_texts(texts, model, vectorizer, self.preprocessor, timer)
+        self.latency.record(timer, source=source, batch_size=len(texts))
+        positive = probabilities[:, list(model.classes_).index(1)]
+        return [
+            {"prediction": int(label), "sentiment": "Positive" if label == 1 else "Negative",
+             "positive_probability": round(float(p), 4)}
+            for label, p in zip(predictions, positive)
+        ]
+
+
+class MicroBatcher:
+    """Collects single texts from many threads and scores them together.
+
+    ``submit(text)`` returns a Future. A single worker thread waits for the
+    first text, keeps collecting until ``window`` seconds have passed or
+    ``max_batch`` texts are queued, then resolves every Future from one call
+    to ``score_batch``.
+    """
+
+    def __init__(self, score_batch, window=DEFAULT_WINDOW_MS / 1000, max_batch=DEFAULT_MAX_BATCH):
+        self.score_batch = score_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.batches = self.items = 0
+        self.worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, text):
+        future = Future()
+        self.pending.put((text, future))
+        return future
+
+    def _collect(self):
+        batch = [self.pending.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.score_batch([text for text, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so load tests measure scoring rather than TCP setup
+    disable_nagle_algorithm = True  # headers and body are separate writes; Nagle + delayed ACK would add ~40 ms
+
+    def _send_json(self, status, payload, close=False):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            # The request body was not read, so the rest of the stream cannot be parsed as requests
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send_json(404, {"error": "not found"})
+        server = self.server
+        payload = {"status": "ok", "model": type(server.scorer.holder.model).__name__, "version": server.scorer.holder.version,
+                   "latency": server.scorer.latency.summary()}
+        if server.batcher:
+            payload["batching"] = {"window_ms": server.batcher.window * 1000, "max_batch": server.batcher.max_batch,
+                                   "batches": server.batcher.batches,
+                                   "mean_batch_size": server.batcher.items / max(server.batcher.batches, 1)}
+        self._send_json(200, payload)
+
+    def do_POST(self):
+        if self.path != "/predict":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self._send_json(400, {"error": "invalid Content-Length"}, close=True)
+        if length > MAX_BODY_BYTES:
+            return self._send_json(413, {"error": "request body too large"}, close=True)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            return self._send_json(400, {"error": "body must be a JSON object"})
+
+        reviews = payload.get("reviews")
+        if isinstance(reviews, list) and all(isinstance(r, str) for r in reviews):
+            if len(reviews) > MAX_BATCH_REVIEWS:
+                return self._send_json(413, {"error": f"at most {MAX_BATCH_REVIEWS} reviews per request"})
+            # Callers that already hold a batch skip the window
+            return self._score(lambda: {"results": self.server.scorer(reviews, source="http_batch") if reviews else []})
+        review = payload.get("review")
+        if not isinstance(review, str) or not review.strip():
+            return self._send_json(400, {"error": "expected {\"review\": \"...\"} or {\"reviews\": [...]}"})
+        if self.server.batcher:
+            return self._score(lambda: self.server.batcher.submit(review).result())
+        self._score(lambda: self.server.scorer([review], source="http")[0])
+
+    def _score(self, score):
+        # A failure inside the model (or a batch it was part of) must still answer the client
+        try:
+            result = score()
+        except Exception:
+            logger.exception("scoring failed")
+            return self._send_json(500, {"error": "scoring failed"})
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 resets connections under a burst of clients
+
+
+def make_server(host, port, scorer, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH):
+    server = ScoringServer((host, port), ScoringHandler)
+    server.scorer = scorer
+    server.batcher = MicroBatcher(scorer, window_ms / 1000, max_batch) if window_ms > 0 else None
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS, help="batching window (0: score each request alone)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--models-dir", default=os.path.join(HERE, MODELS_DIR))
+    parser.add_argument("--artifact", default=os.path.join(HERE, "model_artifact"))
+    parser.add_argument("--model", default=os.path.join(HERE, "best_model.pkl"))
+    parser.add_argument("--vectorizer", default=os.path.join(HERE, "vectorizer.pkl"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    logging.getLogger("review_analyzer.latency").setLevel(logging.WARNING)  # one JSON line per batch is too chatty here
+    holder = ModelHolder(args.models_dir, args.artifact, args.model, args.vectorizer)
+    server = make_server(args.host, args.port, Scorer(holder, Preprocessor()), args.window_ms, args.max_batch)
+    mode = f"micro-batching ({args.window_ms:g} ms window, up to {args.max_batch})" if server.batcher else "per-request scoring"
+    logger.info("serving %s on http://%s:%d with %s", type(holder.model).__name__, args.host, args.port, mode)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
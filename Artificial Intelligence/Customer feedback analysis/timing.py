@@ -0,0 +1,76 @@
+"""Per-stage latency measurement for the scoring pipeline.
+
+A StageTimer collects wall-clock seconds for the named stages of one call
+(preprocess, cache lookup, vectorize, predict). A LatencyWindow keeps the
+last N timings per stage, so the app can show live p50/p95, and every timing
+is also logged as one JSON line on the ``review_analyzer.latency`` logger
+for offline aggregation.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+STAGES = ("preprocess", "cache", "vectorize", "predict")
+
+logger = logging.getLogger("review_analyzer.latency")
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def as_ms(self):
+        timings = {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+        timings["total"] = round(self.total * 1000, 3)
+        return timings
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an unsorted sequence; None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LatencyWindow:
+    """The most recent ``size`` timings per stage, shared by every session of the app."""
+
+    def __init__(self, size=1000):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self.size = size
+        self.count = 0
+
+    def record(self, timer, **fields):
+        timings = timer.as_ms()
+        with self._lock:
+            self.count += 1
+            for name, ms in timings.items():
+                self._samples.setdefault(name, deque(maxlen=self.size)).append(ms)
+        logger.info(json.dumps({"event": "score", **fields, **{f"{name}_ms": ms for name, ms in timings.items()}}))
+
+    def summary(self):
+        """{stage: {'p50': ms, 'p95': ms, 'n': samples}} for each stage seen so far."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        return {
+            name: {"p50": percentile(values, 50), "p95": percentile(values, 95), "n": len(values)}
+            for name, values in samples.items()
+        }
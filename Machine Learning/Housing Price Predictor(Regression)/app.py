@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-import pickle
 import numpy as np
+from registry import ModelPool, current_version, legacy_manifest, load_manifest
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -82,35 +82,31 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# --- LOAD DATA & MODELS ---
-@st.cache_data
-def load_data():
-    data = pd.read_csv('USA_Housing.csv')
-    return data
+# --- LOAD MODEL REGISTRY ---
+PRELOAD_TOP_K = 3  # best models by R2, unpickled in the background at startup
 
-df = load_data()
+@st.cache_resource
+def load_model_pool(version):
+    # one pool per registry version; trees trained before the registry fall back to the loose .pkl files
+    manifest = load_manifest(version=version) if version else legacy_manifest()
+    return ModelPool(manifest, preload_top_k=PRELOAD_TOP_K)
 
-@st.cache_data
-def load_results():
-    try:
-        results_df = pd.read_csv('model evaluation.csv')
-        results_df.columns = [col.strip().upper() for col in results_df.columns]
-        if 'MODEL' in results_df.columns:
-            results_df = results_df.rename(columns={'MODEL': 'MODEL NAME'})
-        return results_df
-    except FileNotFoundError:
-        return None
+pool = load_model_pool(current_version())
+features = {feature['name']: feature for feature in pool.manifest['features']}
 
-results_df = load_results()
+def feature_slider(label, name):
+    feature = features[name]
+    return st.slider(label, int(feature['min']), int(feature['max']), int(feature['mean']))
 
-@st.cache_resource
-def load_model(model_name):
-    try:
-        with open(f'{model_name}.pkl', 'rb') as file:
-            model = pickle.load(file)
-        return model
-    except FileNotFoundError:
-        return None
+def serving_cost(entry):
+    latency = f"{entry['latency_ms']['p50']:.2f} ms" if entry.get('latency_ms') else "n/a"
+    size = f"{entry['size_bytes'] / 1024:,.0f} KB" if entry.get('size_bytes') is not None else "missing"
+    return latency, size
+
+def model_label(name):
+    entry = pool.entries[name]
+    latency, size = serving_cost(entry)
+    return f"{name} · R² {entry['metrics']['R2']:.3f} · {latency} · {size}"
 
 # --- HEADER ---
 st.title('🏠✨ USA Housing Price Predictor ✨')
@@ -123,35 +119,33 @@ with st.container(border=True):
     # --- COLUMN 1: INPUT FEATURES ---
     with col1:
         st.header("⚙️ Step 1: Adjust Features")
-        income = st.slider('💵 Avg. Area Income ($)', int(df['Avg. Area Income'].min()), int(df['Avg. Area Income'].max()), int(df['Avg. Area Income'].mean()))
-        house_age = st.slider('🕰️ Avg. House Age (Years)', int(df['Avg. Area House Age'].min()), int(df['Avg. Area House Age'].max()), int(df['Avg. Area House Age'].mean()))
-        rooms = st.slider('🛋️ Avg. Number of Rooms', int(df['Avg. Area Number of Rooms'].min()), int(df['Avg. Area Number of Rooms'].max()), int(df['Avg. Area Number of Rooms'].mean()))
-        bedrooms = st.slider('🛏️ Avg. Number of Bedrooms', int(df['Avg. Area Number of Bedrooms'].min()), int(df['Avg. Area Number of Bedrooms'].max()), int(df['Avg. Area Number of Bedrooms'].mean()))
-        population = st.slider('👨‍👩‍👧‍👦 Area Population', int(df['Area Population'].min()), int(df['Area Population'].max()), int(df['Area Population'].mean()))
+        income = feature_slider('💵 Avg. Area Income ($)', 'Avg. Area Income')
+        house_age = feature_slider('🕰️ Avg. House Age (Years)', 'Avg. Area House Age')
+        rooms = feature_slider('🛋️ Avg. Number of Rooms', 'Avg. Area Number of Rooms')
+        bedrooms = feature_slider('🛏️ Avg. Number of Bedrooms', 'Avg. Area Number of Bedrooms')
+        population = feature_slider('👨‍👩‍👧‍👦 Area Population', 'Area Population')
 
     # --- COLUMN 2: MODEL SELECTION & PREDICTION ---
     with col2:
         st.header("🧠 Step 2: Predict")
-        model_options = [
-            "LassoRegression", "LinearRegression", "RidgeRegression", "PolynomialRegression",
-            "ElesticNetRegression", "RandomForestRegression", "xgboostRegression", "lightgbmRegression",
-            "KNeighborsRegression", "MLPRegression", "SVR", "HuberReression", "SGDRegression"
-        ]
-        selected_model_name = st.selectbox('🤖 Choose Your AI Brain', model_options, index=0)
+        model_options = list(pool.entries)
+        best_model_name = pool.preload_names[0]
+        selected_model_name = st.selectbox('🤖 Choose Your AI Brain', model_options,
+                                           index=model_options.index(best_model_name), format_func=model_label)
 
         if 'predicted_price' not in st.session_state:
             st.session_state.predicted_price = "Click 'Predict' to see result"
             st.session_state.model_used = ""
 
         if st.button('✨ Predict House Price!', key='predict_button'):
-            model = load_model(selected_model_name)
-            if model:
+            model = pool.get(selected_model_name)
+            if model is not None:
                 input_data = np.array([[income, house_age, rooms, bedrooms, population]])
                 prediction = model.predict(input_data)
                 st.session_state.predicted_price = f"${prediction[0]:,.2f}"
                 st.session_state.model_used = f"(using {selected_model_name})"
             else:
-                st.error(f"Could not load '{selected_model_name}.pkl'.")
+                st.error(f"Could not load '{selected_model_name}.pkl': {pool.error(selected_model_name)}")
 
         st.markdown(f"""
         <div class="prediction-box">
@@ -164,36 +158,45 @@ with st.container(border=True):
     # --- COLUMN 3: MODEL INSIGHTS (DYNAMIC) ---
     with col3:
         st.header("📊 Step 3: AI Report Card")
-        if results_df is not None and not results_df.empty:
-            results_df['R2'] = pd.to_numeric(results_df['R2'], errors='coerce')
-            results_df['MAE'] = pd.to_numeric(results_df['MAE'], errors='coerce')
-            results_df_sorted = results_df.sort_values(by='R2', ascending=False).dropna()
-
-            if not results_df_sorted.empty:
-                best_model_row = results_df_sorted.iloc[0]
-                model_stats = results_df[results_df['MODEL NAME'].str.strip() == selected_model_name.strip()]
-
-                if not model_stats.empty:
-                    model_stats = model_stats.iloc[0]
-                    model_r2 = model_stats['R2']
-                    model_mae = model_stats['MAE']
-
-                    st.write(f"You've selected **{selected_model_name}**. Here's its performance review:")
-
-                    mcol1, mcol2 = st.columns(2)
-                    mcol1.metric("🎯 Accuracy Score", f"{model_r2:.3f}")
-                    mcol2.metric("💲 Avg. Error", f"${model_mae:,.0f}")
-
-                    if model_r2 >= best_model_row['R2'] * 0.98:
-                        st.success(f"⭐ **Excellent Choice:** This AI is a top performer, providing highly reliable predictions!")
-                    elif model_r2 > 0.85:
-                        st.info(f"👍 **Good Choice:** This AI is a solid performer and reliable for most predictions.")
-                    else:
-                        st.warning(f"🤔 **Use with Caution:** This AI is less reliable and may have a higher prediction error.")
-                else:
-                    st.error(f"No performance data found for '{selected_model_name}'.")
-            else:
-                st.warning("Could not analyze model performance from the results file.")
+        entry = pool.entries[selected_model_name]
+        model_r2 = entry['metrics']['R2']
+        model_mae = entry['metrics']['MAE']
+        best_r2 = pool.entries[best_model_name]['metrics']['R2']
+        latency, size = serving_cost(entry)
+
+        st.write(f"You've selected **{selected_model_name}**. Here's its performance review:")
+
+        mcol1, mcol2 = st.columns(2)
+        mcol1.metric("🎯 Accuracy Score", f"{model_r2:.3f}")
+        mcol2.metric("💲 Avg. Error", f"${model_mae:,.0f}")
+        mcol3, mcol4 = st.columns(2)
+        mcol3.metric("⚡ Predict Latency (p50)", latency)
+        mcol4.metric("💾 Model Size", size)
+
+        if model_r2 >= best_r2 * 0.98:
+            st.success(f"⭐ **Excellent Choice:** This AI is a top performer, providing highly reliable predictions!")
+        elif model_r2 > 0.85:
+            st.info(f"👍 **Good Choice:** This AI is a solid performer and reliable for most predictions.")
         else:
-            st.error("Could not find 'model evaluation.csv' file.")
-
+            st.warning(f"🤔 **Use with Caution:** This AI is less reliable and may have a higher prediction error.")
+
+with st.expander("🗂️ Model registry: accuracy vs. serving cost"):
+    if pool.manifest['version']:
+        data = pool.manifest['data']
+        st.caption(f"Version {pool.manifest['version']} · trained {pool.manifest['created_at']} on "
+                   f"{data['file']} ({data['rows']:,} rows, sha256 {data['sha256'][:12]})")
+    else:
+        st.caption("No registry found; showing the loose .pkl files. Run models.py to publish a registry version "
+                   "with measured latencies.")
+    rows = []
+    for name, entry in pool.entries.items():
+        latency, size = serving_cost(entry)
+        if pool.is_loaded(name):
+            status = f"in memory ({pool.load_ms[name]:.0f} ms to load)"
+        elif pool.error(name):
+            status = "unavailable"
+        else:
+            status = "preloading" if name in pool.preload_names else "loads on first use"
+        rows.append({"Model": name, "R²": entry['metrics']['R2'], "MAE ($)": entry['metrics']['MAE'],
+                     "Latency p50": latency, "Size": size, "Status": status})
+    st.dataframe(pd.DataFrame(rows).sort_values("R²", ascending=False), hide_index=True, use_container_width=True)
@@ -18,17 +18,21 @@ from sklearn.neural_network import MLPRegressor
 import lightgbm as lgb
 import xgboost as xgb
 from sklearn.metrics import (mean_absolute_error,mean_squared_error,r2_score)
-import pickle
+import os
 
+from registry import publish
 
-data=pd.read_csv(r"C:\Users\Shivam Kumar yadav\OneDrive\Desktop\FSDS\Machine Learning (ML)\Self_Practice\house project Regression\USA_Housing.csv")
+
+DATA_PATH=os.path.join(os.path.dirname(os.path.abspath(__file__)),'USA_Housing.csv')
+data=pd.read_csv(DATA_PATH)
 
 #X=data.drop(['Price','Address'],axis=1)
 
 X=data.iloc[:,:5]
 y=data.iloc[:,5]
 
-X_train,X_test,y_train,y_test=train_test_split(X,y,test_size=0.2,random_state=0)
+split={'test_size':0.2,'random_state':0}
+X_train,X_test,y_train,y_test=train_test_split(X,y,**split)
 
 
 models={
@@ -50,6 +54,7 @@ models={
         }
 
 result=[]
+metrics={}
 
 for name,model in models.items():
     model.fit(X_train,y_train)
@@ -65,11 +70,13 @@ for name,model in models.items():
         'MAE':mae,
         'R2':r2
         })
-    with open (f'{name}.pkl','wb')as f:
-        pickle.dump(model,f)
-        
+    metrics[name]={'MSE':float(mse),'MAE':float(mae),'R2':float(r2)}
+
+# every model, its metrics, size and single-row latency go into one registry version (see registry.py)
+version=publish(models,metrics,X,DATA_PATH,split)
+
 result_df=pd.DataFrame(result)
 result_df.to_csv('model evaluation.csv',index=False)        
 
-print('code is pickle and save and the model evalution csv file is also save ')
+print(f'models trained once and published as registry/{version}; model evaluation csv file is also saved')
         
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Versioned registry of the trained housing price models.
+
+models.py trains every model once and publishes the whole set as a new
+version:
+
+    registry/
+        CURRENT             name of the live version, e.g. "v0002"
+        v0002/
+            manifest.json   feature schema, training-data hash, split, and per model:
+                            metrics (MSE/MAE/R2), file size, single-row predict latency
+            LinearRegression.pkl
+            ...
+
+A version is written to a staging directory and renamed into place. CURRENT
+is then swapped with os.replace, so the app never sees a half-written
+version. ModelPool is what the app serves from. A background thread loads
+the top-K models by R2, and every other model is unpickled the first time
+it is selected.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+REGISTRY_DIR = 'registry'
+CURRENT_NAME = 'CURRENT'
+MANIFEST_NAME = 'manifest.json'
+VERSION_PATTERN = re.compile(r'^v(\d+)$')
+LATENCY_REPEATS = 200
+
+
+# --- METADATA ---
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def feature_schema(X):
+    """Name, dtype and range of every input column, in the order models expect them."""
+    return [
+        {'name': column, 'dtype': str(X[column].dtype), 'min': float(X[column].min()),
+         'max': float(X[column].max()), 'mean': float(X[column].mean())}
+        for column in X.columns
+    ]
+
+
+def predict_latency(model, row, repeats=LATENCY_REPEATS):
+    """p50/p95 milliseconds of model.predict on one row, the way the app calls it."""
+    model.predict(row)  # warm up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        model.predict(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'p50': float(np.percentile(timings, 50)), 'p95': float(np.percentile(timings, 95))}
+
+
+# --- PUBLISH / READ ---
+def list_versions(registry_dir=REGISTRY_DIR):
+    if not os.path.isdir(registry_dir):
+        return []
+    numbers = [int(m.group(1)) for m in map(VERSION_PATTERN.match, os.listdir(registry_dir)) if m]
+    return [f'v{n:04d}' for n in sorted(numbers)]
+
+
+def current_version(registry_dir=REGISTRY_DIR):
+    try:
+        with open(os.path.join(registry_dir, CURRENT_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(models, metrics, X, data_path, split, registry_dir=REGISTRY_DIR):
+    """Save fitted ``models`` ({name: model}) with their ``metrics`` as a new live version; returns its name."""
+    os.makedirs(registry_dir, exist_ok=True)
+    versions = list_versions(registry_dir)
+    version = f'v{int(versions[-1][1:]) + 1 if versions else 1:04d}'
+    staging = os.path.join(registry_dir, f'.{version}.tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    row = X.iloc[:1].to_numpy()  # the app predicts from a plain (1, n_features) array
+    entries = []
+    for name, model in models.items():
+        path = os.path.join(staging, f'{name}.pkl')
+        with open(path, 'wb') as f:
+            pickle.dump(model, f)
+        entries.append({
+            'name': name,
+            'file': f'{name}.pkl',
+            'estimator': type(model).__name__,
+            'metrics': metrics[name],
+            'size_bytes': os.path.getsize(path),
+            'latency_ms': predict_latency(model, row),
+        })
+
+    manifest = {
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'data': {'file': os.path.basename(data_path), 'sha256': file_sha256(data_path), 'rows': len(X)},
+        'split': split,
+        'features': feature_schema(X),
+        'models': entries,
+    }
+    with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, os.path.join(registry_dir, version))
+
+    pointer = os.path.join(registry_dir, f'.{CURRENT_NAME}.tmp')
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(registry_dir, CURRENT_NAME))
+    return version
+
+
+def load_manifest(registry_dir=REGISTRY_DIR, version=None):
+    version = version or current_version(registry_dir)
+    if version is None:
+        return None
+    with open(os.path.join(registry_dir, version, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    manifest['path'] = os.path.join(registry_dir, version)
+    return manifest
+
+
+def legacy_manifest(directory='.', data_file='USA_Housing.csv', results_file='model evaluation.csv'):
+    """Manifest-shaped view of loose .pkl files from before the registry; latency is unknown."""
+    X = pd.read_csv(os.path.join(directory, data_file)).iloc[:, :5]
+    results = pd.read_csv(os.path.join(directory, results_file))
+    entries = []
+    for record in results.to_dict('records'):
+        path = os.path.join(directory, f"{record['model']}.pkl")
+        entries.append({
+            'name': record['model'],
+            'file': f"{record['model']}.pkl",
+            'metrics': {'MSE': record['MSE'], 'MAE': record['MAE'], 'R2': record['R2']},
+            'size_bytes': os.path.getsize(path) if os.path.exists(path) else None,
+            'latency_ms': None,
+        })
+    return {'version': None, 'path': directory, 'features': feature_schema(X), 'models': entries}
+
+
+# --- SERVING ---
+class ModelPool:
+    """Unpickled models of one manifest, preloaded best-first in the background and loaded lazily otherwise."""
+
+    def __init__(self, manifest, preload_top_k=3):
+        self.manifest = manifest
+        self.entries = {entry['name']: entry for entry in manifest['models']}
+        self._models = {}
+        self._errors = {}
+        self.load_ms = {}
+        self._lock = threading.Lock()
+        ranked = sorted(manifest['models'], key=lambda e: e['metrics'].get('R2', float('-inf')), reverse=True)
+        self.preload_names = [entry['name'] for entry in ranked[:preload_top_k]]
+        self._preloader = threading.Thread(target=self._preload, name='model-preload', daemon=True)
+        self._preloader.start()
+
+    def _preload(self):
+        for name in self.preload_names:
+            self.get(name)
+
+    def get(self, name):
+        """The model called ``name``, or None if it is missing or cannot be unpickled."""
+        with self._lock:
+            if name in self._models:
+                return self._models[name]
+            if name in self._errors or name not in self.entries:
+                return None
+        started = time.perf_counter()
+        try:
+            with open(os.path.join(self.manifest['path'], self.entries[name]['file']), 'rb') as f:
+                model = pickle.load(f)
+        except Exception as exc:  # missing file, or a library (xgboost, lightgbm) not installed here
+            with self._lock:
+                self._errors[name] = str(exc)
+            return None
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first copy
+            model = self._models.setdefault(name, model)
+            self.load_ms.setdefault(name, (time.perf_counter() - started) * 1000)
+        return model
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._models
+
+    def error(self, name):
+        with self._lock:
+            return self._errors.get(name)
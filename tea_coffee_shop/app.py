@@ -1,18 +1,69 @@
+import hashlib
+import hmac
+import json
+import mimetypes
 import os
+import queue
+import random
+import re
+import secrets
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
 from decimal import Decimal
-from datetime import datetime
-from typing import Dict, Tuple, List
-
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Tuple, List, NamedTuple, Optional, Iterable
+
+import click
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, g, make_response
+from flask import before_render_template, template_rendered, has_request_context, send_file, abort
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
+from sqlalchemy import func, event, text, insert, update, literal, inspect as sa_inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, selectinload, undefer
 from flask_wtf.csrf import CSRFProtect, generate_csrf, validate_csrf
+from werkzeug.security import safe_join
+
+import assets
+import fixtures
+from metrics import Registry, Counter, Histogram, CallbackMetric
 
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-change-me')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(os.path.dirname(__file__), 'tea_coffee_shop.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+	'DATABASE_URL', 'sqlite:///' + os.path.join(os.path.dirname(__file__), 'tea_coffee_shop.db')
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Bounded connection pool: each worker holds at most pool_size + max_overflow connections
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+	'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+	'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+	'pool_timeout': 10,
+	'pool_recycle': 3600,
+}
+
+# WAL lets /menu readers proceed while a /checkout write is in flight
+SQLITE_PRAGMAS = {
+	'journal_mode': 'WAL',
+	'synchronous': 'NORMAL',
+	'cache_size': -16000,  # negative means KiB, so ~16 MB per connection
+	'mmap_size': 128 * 1024 * 1024,
+	'busy_timeout': 5000,
+	'temp_store': 'MEMORY',
+}
+
+# Shared secret for the admin/report pages (X-Admin-Token header or ?token=); unset disables them
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+# Shared secret partner kiosks send as X-API-Key to /api/orders/bulk; unset disables the endpoint
+app.config['KIOSK_API_KEY'] = os.environ.get('KIOSK_API_KEY')
 
 # Security hardening defaults
 app.config['SESSION_COOKIE_HTTPONLY'] = True
@@ -22,6 +73,16 @@ csrf = CSRFProtect(app)
 db = SQLAlchemy(app)
 
 
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+	if not isinstance(dbapi_connection, sqlite3.Connection):
+		return
+	cursor = dbapi_connection.cursor()
+	for pragma, value in SQLITE_PRAGMAS.items():
+		cursor.execute(f'PRAGMA {pragma}={value}')
+	cursor.close()
+
+
 # Database models
 class Product(db.Model):
 	id = db.Column(db.Integer, primary_key=True)
@@ -32,6 +93,13 @@ class Product(db.Model):
 	description = db.Column(db.Text, nullable=False)
 	image = db.Column(db.String(200), nullable=True)
 	is_featured = db.Column(db.Boolean, default=False)
+	stock = db.Column(db.Integer, nullable=True)  # units on hand; NULL means not stock-tracked
+
+	__table_args__ = (
+		db.Index('ix_product_category_name', 'category', 'name'),  # /menu sort, category filter, related items
+		db.Index('ix_product_type_category_name', 'product_type', 'category', 'name'),  # /menu?type=
+		db.Index('ix_product_is_featured', 'is_featured'),  # home page
+	)
 
 
 class Order(db.Model):
@@ -46,15 +114,15 @@ class Order(db.Model):
 
 	items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
 
-	@property
-	def total(self):
-		return sum(item.subtotal for item in self.items)
+	__table_args__ = (
+		db.Index('ix_order_status_created_at', 'status', 'created_at'),  # status advancer
+	)
 
 
 class OrderItem(db.Model):
 	id = db.Column(db.Integer, primary_key=True)
-	order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-	product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+	order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+	product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
 	quantity = db.Column(db.Integer, nullable=False, default=1)
 	unit_price = db.Column(db.Numeric(10, 2), nullable=False)
 	product = db.relationship('Product')
@@ -64,9 +132,100 @@ class OrderItem(db.Model):
 		return self.unit_price * self.quantity
 
 
+class CartLine(db.Model):
+	cart_id = db.Column(db.String(32), primary_key=True)
+	product_id = db.Column(db.Integer, primary_key=True)
+	quantity = db.Column(db.Integer, nullable=False)
+	updated_at = db.Column(db.DateTime, server_default=func.now())  # the same on every line of a cart
+
+	__table_args__ = (
+		db.Index('ix_cart_line_updated_at', 'updated_at'),  # expiry sweep
+	)
+
+
+class StockReservation(db.Model):
+	"""Units of a stock-tracked product held for a cart until ``expires_at``."""
+	cart_id = db.Column(db.String(32), primary_key=True)
+	product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+	quantity = db.Column(db.Integer, nullable=False)
+	expires_at = db.Column(db.DateTime, nullable=False)
+
+	__table_args__ = (
+		db.Index('ix_stock_reservation_product_expires', 'product_id', 'expires_at'),
+	)
+
+
+# Sales rollups, maintained incrementally by record_sales() inside each order transaction
+class DailySales(db.Model):
+	day = db.Column(db.Date, primary_key=True)
+	orders = db.Column(db.Integer, nullable=False, default=0)
+	units = db.Column(db.Integer, nullable=False, default=0)
+	revenue_cents = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyProductSales(db.Model):
+	day = db.Column(db.Date, primary_key=True)
+	product_id = db.Column(db.Integer, primary_key=True)
+	category = db.Column(db.String(50), nullable=False)
+	units = db.Column(db.Integer, nullable=False, default=0)
+	revenue_cents = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Job(db.Model):
+	"""Background work item; see the job queue section below."""
+	id = db.Column(db.Integer, primary_key=True)
+	kind = db.Column(db.String(50), nullable=False)
+	payload = db.Column(db.Text, nullable=False, default='{}')
+	idempotency_key = db.Column(db.String(120), nullable=False, unique=True)
+	status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+	attempts = db.Column(db.Integer, nullable=False, default=0)
+	max_attempts = db.Column(db.Integer, nullable=False, default=5)
+	last_error = db.Column(db.Text, nullable=True)
+	created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+	run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+	started_at = db.Column(db.DateTime, nullable=True)
+	finished_at = db.Column(db.DateTime, nullable=True)
+
+	__table_args__ = (
+		db.Index('ix_job_status_run_after', 'status', 'run_after'),  # worker claim query
+	)
+
+
+class Lease(db.Model):
+	"""Named lease that lets one process among many run a periodic task."""
+	name = db.Column(db.String(50), primary_key=True)
+	holder = db.Column(db.String(120), nullable=False)
+	expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class CatalogVersion(db.Model):
+	"""Single row counting product changes; see the product catalog cache below."""
+	id = db.Column(db.Integer, primary_key=True)
+	version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CatalogChange(db.Model):
+	"""Product id changed at each catalog version, so caches can re-read just those rows."""
+	id = db.Column(db.Integer, primary_key=True)
+	version = db.Column(db.Integer, nullable=False, index=True)
+	product_id = db.Column(db.Integer, nullable=False)
+
+
+# Order total as one SQL aggregate; deferred so it only loads when asked for
+Order.total = db.column_property(
+	db.select(func.coalesce(func.sum(OrderItem.unit_price * OrderItem.quantity), 0))
+	.where(OrderItem.order_id == Order.id)
+	.correlate_except(OrderItem)
+	.scalar_subquery(),
+	deferred=True
+)
+
+
 # Utility and setup
 ALL_CATEGORIES = ['Tea', 'Coffee']
 ALL_TYPES = ['Instant', 'Fresh Brew', 'Beans', 'Leaves']
+DELIVERY_OPTIONS = ['Instant Delivery', 'Fresh Brew', 'Contactless Delivery']
+MAX_BULK_ORDERS = 1000
 
 
 def currency(value):
@@ -79,12 +238,413 @@ def currency(value):
 app.jinja_env.filters['currency'] = currency
 
 
+# Product catalog cache
+class ProductSnapshot(NamedTuple):
+	id: int
+	name: str
+	category: str
+	product_type: str
+	price: Decimal
+	description: str
+	image: Optional[str]
+	is_featured: bool
+	stock_tracked: bool  # whether stock is tracked at all; the level itself is only read in SQL
+
+	@classmethod
+	def from_model(cls, product) -> 'ProductSnapshot':
+		"""Build from a Product, or from a row of ``SNAPSHOT_COLUMNS``."""
+		return cls(
+			id=product.id,
+			name=product.name,
+			category=product.category,
+			product_type=product.product_type,
+			price=Decimal(product.price),
+			description=product.description,
+			image=product.image,
+			is_featured=bool(product.is_featured),
+			stock_tracked=product.stock is not None
+		)
+
+
+SNAPSHOT_COLUMNS = (
+	Product.id, Product.name, Product.category, Product.product_type, Product.price,
+	Product.description, Product.image, Product.is_featured, Product.stock
+)
+
+# Triggers bump catalog_version.version in the writing transaction whenever a
+# product row changes in a way a ProductSnapshot can see, and log the product
+# id under the new version in catalog_change. Every writer is covered, whatever
+# process or connection it uses: other gunicorn workers, the CLI commands and
+# the raw-connection seed. Stock levels are left out (see Inventory below), so
+# checkouts do not invalidate anything; only switching a product between
+# tracked and unlimited counts. Keep the column list in step with
+# ProductSnapshot. The log keeps the last CATALOG_CHANGE_LOG versions.
+CATALOG_CHANGE_LOG = 1000
+_LOG_CATALOG_CHANGE = f"""
+		UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+		INSERT INTO catalog_change (version, product_id) SELECT version, {{product_id}} FROM catalog_version WHERE id = 1;
+		DELETE FROM catalog_change
+		WHERE version <= (SELECT version FROM catalog_version WHERE id = 1) - {CATALOG_CHANGE_LOG};"""
+CATALOG_VERSION_TRIGGERS = ['product_catalog_ai', 'product_catalog_ad', 'product_catalog_au', 'product_catalog_au_id']
+CATALOG_VERSION_DDL = [
+	f"""CREATE TRIGGER product_catalog_ai AFTER INSERT ON product BEGIN{_LOG_CATALOG_CHANGE.format(product_id='new.id')}
+	END""",
+	f"""CREATE TRIGGER product_catalog_ad AFTER DELETE ON product BEGIN{_LOG_CATALOG_CHANGE.format(product_id='old.id')}
+	END""",
+	f"""CREATE TRIGGER product_catalog_au AFTER UPDATE ON product
+	WHEN old.id IS NOT new.id OR old.name IS NOT new.name OR old.category IS NOT new.category
+		OR old.product_type IS NOT new.product_type OR old.price IS NOT new.price
+		OR old.description IS NOT new.description OR old.image IS NOT new.image
+		OR old.is_featured IS NOT new.is_featured OR (old.stock IS NULL) IS NOT (new.stock IS NULL)
+	BEGIN{_LOG_CATALOG_CHANGE.format(product_id='new.id')}
+	END""",
+	# A renumbered product also disappears from its old id
+	f"""CREATE TRIGGER product_catalog_au_id AFTER UPDATE OF id ON product WHEN old.id IS NOT new.id
+	BEGIN{_LOG_CATALOG_CHANGE.format(product_id='old.id')}
+	END""",
+]
+
+
+def ensure_catalog_version() -> None:
+	"""Create the catalog_version row and (re)create the triggers that maintain it."""
+	db.session.execute(text('INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)'))
+	for name in CATALOG_VERSION_TRIGGERS:
+		db.session.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+	for ddl in CATALOG_VERSION_DDL:
+		db.session.execute(text(ddl))
+	db.session.commit()
+
+
+def read_catalog_version() -> int:
+	return db.session.execute(text('SELECT version FROM catalog_version WHERE id = 1')).scalar() or 0
+
+
+app.config['CATALOG_CHECK_INTERVAL'] = float(os.environ.get('CATALOG_CHECK_INTERVAL', 1.0))
+
+
+class CatalogStamp:
+	"""This process's copy of ``catalog_version``, re-read at most every ``CATALOG_CHECK_INTERVAL`` seconds.
+
+	A commit in this process that changes products expires it, so the writer
+	sees its own change on its next read. Other processes' changes show up
+	within one interval.
+	"""
+
+	def __init__(self) -> None:
+		self._cached: Tuple[Optional[int], float] = (None, 0.0)  # version, monotonic time the read started
+		self._expired_at = 0.0
+
+	def get(self) -> int:
+		version, read_at = self._cached
+		now = time.monotonic()
+		if version is None or read_at <= self._expired_at or now - read_at >= app.config['CATALOG_CHECK_INTERVAL']:
+			version = read_catalog_version()
+			self._cached = (version, now)
+		return version
+
+	def expire(self) -> None:
+		# A read that started before this instant may predate the commit, so it does not count
+		self._expired_at = time.monotonic()
+
+
+catalog_stamp = CatalogStamp()
+
+
+def catalog_version() -> int:
+	"""The shared product version stamp, the same for the whole of a request."""
+	if has_request_context() and 'catalog_version' in g:
+		return g.catalog_version
+	version = catalog_stamp.get()
+	if has_request_context():
+		g.catalog_version = version
+	return version
+
+
+class ProductCatalog:
+	"""Process-local copy of the product table, keyed by product id.
+
+	The copy is tagged with the ``catalog_version`` it reflects. A reader that
+	sees a newer stamp refreshes it: only the products logged in
+	``catalog_change`` since the copy's version are re-read. The whole table
+	is loaded on first use, or when the copy is older than the log. One thread
+	refreshes at a time while the others keep reading the copy they have, so
+	only the very first load makes requests wait.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._products: Dict[int, ProductSnapshot] = {}
+		self._loaded_version: Optional[int] = None
+		self.lookups = 0
+		self.reloads = 0
+
+	def _snapshot(self) -> Dict[int, ProductSnapshot]:
+		self.lookups += 1
+		version = catalog_version()
+		if self._loaded_version is not None and self._loaded_version >= version:
+			return self._products
+		if not self._lock.acquire(blocking=self._loaded_version is None):
+			return self._products
+		try:
+			if self._loaded_version is None or self._loaded_version < version:
+				self.reloads += 1
+				self._refresh()
+			return self._products
+		finally:
+			self._lock.release()
+
+	def _refresh(self) -> None:
+		if self._loaded_version is not None:
+			changes = db.session.execute(
+				db.select(CatalogChange.version, CatalogChange.product_id)
+				.where(CatalogChange.version > self._loaded_version)
+			).all()
+			# Versions are consecutive, so a gap means the log was trimmed past this copy
+			if changes and min(version for version, _ in changes) == self._loaded_version + 1:
+				changed_ids = {product_id for _, product_id in changes}
+				products = {pid: p for pid, p in self._products.items() if pid not in changed_ids}
+				rows = db.session.execute(db.select(*SNAPSHOT_COLUMNS).where(Product.id.in_(changed_ids)))
+				products.update((row.id, ProductSnapshot.from_model(row)) for row in rows)
+				self._products = products
+				self._loaded_version = max(version for version, _ in changes)
+				return
+		# The stamp is read before the rows, so a load is never tagged newer than the data it holds
+		version = read_catalog_version()
+		rows = db.session.execute(db.select(*SNAPSHOT_COLUMNS))
+		self._products = {row.id: ProductSnapshot.from_model(row) for row in rows}
+		self._loaded_version = version
+
+	def get(self, product_id: int) -> Optional[ProductSnapshot]:
+		return self._snapshot().get(product_id)
+
+	def get_many(self, product_ids: Iterable[int]) -> Dict[int, ProductSnapshot]:
+		products = self._snapshot()
+		return {pid: products[pid] for pid in product_ids if pid in products}
+
+
+catalog = ProductCatalog()
+
+
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_update')
+@event.listens_for(Product, 'after_delete')
+def _mark_catalog_dirty(mapper, connection, target):
+	Session.object_session(target).info['catalog_dirty'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_catalog(db_session):
+	# The triggers have bumped the shared stamp; re-read it instead of the one cached here
+	if db_session.info.pop('catalog_dirty', False):
+		catalog_stamp.expire()
+		if has_request_context():
+			g.pop('catalog_version', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_flag(db_session):
+	db_session.info.pop('catalog_dirty', None)
+
+
+# Page cache
+class CachedPage(NamedTuple):
+	body: bytes
+	etag: str
+	encoded: Dict[str, bytes]  # Content-Encoding -> compressed body, filled on first request for it
+
+	def variant(self, encoding: Optional[str]) -> bytes:
+		if encoding is None:
+			return self.body
+		body = self.encoded.get(encoding)
+		if body is None:
+			# This runs inside the request that missed it, so use the fast levels like any other
+			# response; max quality is kept for build-assets, which runs outside any request
+			body = self.encoded[encoding] = compress_body(self.body, encoding)
+		return body
+
+
+class PageCache:
+	"""Bounded LRU of rendered catalog pages, tagged with the catalog version.
+
+	Entries are keyed by endpoint, view arguments and query arguments. The
+	version is the shared ``catalog_version()``, so a product change made by
+	any process empties every worker's cache within ``CATALOG_CHECK_INTERVAL``
+	seconds, after which a stale page is never served or confirmed with a 304.
+	"""
+
+	def __init__(self, max_entries: int = 256) -> None:
+		self._lock = threading.Lock()
+		self._entries: 'OrderedDict[tuple, CachedPage]' = OrderedDict()
+		self._version = None
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key: tuple, version: int) -> Optional[CachedPage]:
+		with self._lock:
+			if version != self._version:
+				self._entries.clear()
+				self._version = version
+			page = self._entries.get(key)
+			if page is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return page
+
+	def set(self, key: tuple, version: int, body: bytes) -> CachedPage:
+		page = CachedPage(body=body, etag=hashlib.sha1(body).hexdigest(), encoded={})
+		with self._lock:
+			if version == self._version:
+				self._entries[key] = page
+				self._entries.move_to_end(key)
+				while len(self._entries) > self.max_entries:
+					self._entries.popitem(last=False)
+		return page
+
+
+page_cache = PageCache()
+
+
+def cached_page(view):
+	"""Serve a catalog page from ``page_cache`` with ETag revalidation.
+
+	The cached HTML carries no per-user state: ``base.html`` fetches the cart
+	count and CSRF token from ``session_fragment`` instead. Requests with
+	pending flash messages bypass the cache so the messages are shown.
+	"""
+	@wraps(view)
+	def wrapper(*args, **kwargs):
+		if session.get('_flashes'):
+			return view(*args, **kwargs)
+
+		version = catalog_version()
+		key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+		page = page_cache.get(key, version)
+		if page is None:
+			g.cacheable_page = True
+			rendered = make_response(view(*args, **kwargs))
+			if rendered.status_code != 200:
+				return rendered
+			page = page_cache.set(key, version, rendered.get_data())
+
+		encoding = preferred_encoding(HTML_ENCODINGS) if len(page.body) >= app.config['COMPRESS_MIN_SIZE'] else None
+		response = Response(page.variant(encoding), mimetype='text/html')
+		if encoding:
+			response.headers['Content-Encoding'] = encoding
+		response.vary.add('Accept-Encoding')
+		response.set_etag(f'{page.etag}-{encoding}' if encoding else page.etag)
+		response.cache_control.no_cache = True
+		return response.make_conditional(request)
+	return wrapper
+
+
+# Static assets and response compression
+# `flask --app app build-assets` writes fingerprinted copies of static/ to static/dist;
+# url_for('static', ...) then points at those, and they are cached for a year
+STATIC_MAX_AGE = 365 * 24 * 3600
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+HTML_ENCODINGS = ('br', 'gzip') if assets.brotli is not None else ('gzip',)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+
+
+class AssetManifest:
+	"""Logical static path -> fingerprinted name, re-read whenever a new build lands."""
+
+	def __init__(self, static_dir: str) -> None:
+		self.path = os.path.join(static_dir, assets.DIST_DIR, assets.MANIFEST_NAME)
+		self.static_dir = static_dir
+		self._mtime: Optional[float] = None
+		self._entries: Dict[str, str] = {}
+
+	def get(self, filename: str) -> Optional[str]:
+		try:
+			mtime = os.stat(self.path).st_mtime
+		except FileNotFoundError:
+			mtime = None
+		if mtime != self._mtime:
+			self._entries = assets.load_manifest(self.static_dir) if mtime is not None else {}
+			self._mtime = mtime
+		return self._entries.get(filename)
+
+
+asset_manifest = AssetManifest(app.static_folder)
+
+
+@app.url_defaults
+def _fingerprint_static_urls(endpoint, values):
+	if endpoint == 'static':
+		hashed = asset_manifest.get(values.get('filename', ''))
+		if hashed:
+			values['filename'] = f'{assets.DIST_DIR}/{hashed}'
+
+
+def preferred_encoding(available: Iterable[str]) -> Optional[str]:
+	"""First of ``available`` (in server preference order) that the client accepts."""
+	for encoding in available:
+		if request.accept_encodings[encoding] > 0:
+			return encoding
+	return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+	if encoding == 'br':
+		return assets.brotli_bytes(body, quality=5)
+	return assets.gzip_bytes(body, level=6)
+
+
+def serve_static(filename: str):
+	"""Flask's static view, plus immutable caching and precompressed variants for built assets."""
+	if not filename.startswith(assets.DIST_DIR + '/'):
+		return app.send_static_file(filename)
+	path = safe_join(app.static_folder, filename)
+	if path is None or not os.path.isfile(path):
+		abort(404)
+	encoding = preferred_encoding(e for e, suffix in ENCODING_SUFFIXES.items() if os.path.isfile(path + suffix))
+	response = send_file(
+		path + ENCODING_SUFFIXES[encoding] if encoding else path,
+		mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+		max_age=STATIC_MAX_AGE,
+		conditional=True,
+	)
+	if encoding:
+		response.headers['Content-Encoding'] = encoding
+	response.vary.add('Accept-Encoding')
+	response.cache_control.public = True
+	response.cache_control.immutable = True
+	return response
+
+
+app.view_functions['static'] = serve_static
+
+
+@app.after_request
+def _compress_html(response):
+	if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+			or response.mimetype != 'text/html' or 'Content-Encoding' in response.headers):
+		return response
+	response.vary.add('Accept-Encoding')
+	body = response.get_data()
+	if len(body) < app.config['COMPRESS_MIN_SIZE']:
+		return response
+	encoding = preferred_encoding(HTML_ENCODINGS)
+	if encoding is None:
+		return response
+	response.set_data(compress_body(body, encoding))
+	response.headers['Content-Encoding'] = encoding
+	return response
+
+
 @app.context_processor
 def inject_globals():
-	cart: Dict[str, int] = session.get('cart', {})
-	cart_count = sum(cart.values())
+	if g.get('cacheable_page'):
+		# Shared HTML: per-user values are filled in client-side from session_fragment
+		return dict(cacheable_page=True, cart_count=None, csrf_token='',
+					all_categories=ALL_CATEGORIES, all_types=ALL_TYPES)
 	return dict(
-		cart_count=cart_count,
+		cacheable_page=False,
+		cart_count=cart_item_count(),
 		all_categories=ALL_CATEGORIES,
 		all_types=ALL_TYPES,
 		csrf_token=generate_csrf()
@@ -144,38 +704,267 @@ def initialize_products():
 	db.session.commit()
 
 
-# Cart helpers
-CartData = Dict[str, int]
+# Cart storage
+CartData = Dict[int, int]
+
+app.config['CART_BACKEND'] = os.environ.get('CART_BACKEND', 'memory')  # memory (single process) or sqlite
+app.config['CART_MAX_ENTRIES'] = int(os.environ.get('CART_MAX_ENTRIES', 10000))
+app.config['CART_TTL'] = int(os.environ.get('CART_TTL', 7 * 24 * 3600))  # sqlite carts unchanged this long are deleted
+CART_SWEEP_INTERVAL = 300
+
+
+class MemoryCartStore:
+	"""Carts held in this process; the least recently used cart is evicted first."""
+
+	def __init__(self, max_carts: int) -> None:
+		self._lock = threading.Lock()
+		self._carts: 'OrderedDict[str, CartData]' = OrderedDict()
+		self.max_carts = max_carts
+
+	def load(self, cart_id: str) -> CartData:
+		with self._lock:
+			cart = self._carts.get(cart_id)
+			if cart is None:
+				return {}
+			self._carts.move_to_end(cart_id)
+			return dict(cart)
+
+	def apply(self, cart_id: str, changes: CartData) -> None:
+		with self._lock:
+			cart = self._carts.setdefault(cart_id, {})
+			for product_id, quantity in changes.items():
+				if quantity <= 0:
+					cart.pop(product_id, None)
+				else:
+					cart[product_id] = quantity
+			self._carts.move_to_end(cart_id)
+			while len(self._carts) > self.max_carts:
+				self._carts.popitem(last=False)
+
+	def clear(self, cart_id: str) -> None:
+		with self._lock:
+			self._carts.pop(cart_id, None)
+
+
+class SQLiteCartStore:
+	"""Carts stored as ``CartLine`` rows in the shop database, shared by all workers.
+
+	Every write stamps all lines of its cart, so a cart's lines share the time
+	it last changed. At most every ``CART_SWEEP_INTERVAL`` seconds, a write in
+	each process also deletes the carts unchanged for ``CART_TTL`` seconds,
+	with one range delete on the ``updated_at`` index.
+	"""
+
+	def __init__(self) -> None:
+		self._last_sweep = 0.0
+
+	def load(self, cart_id: str) -> CartData:
+		rows = db.session.execute(
+			db.select(CartLine.product_id, CartLine.quantity).where(CartLine.cart_id == cart_id)
+		).all()
+		return {product_id: quantity for product_id, quantity in rows}
+
+	def apply(self, cart_id: str, changes: CartData) -> None:
+		upserts = [
+			{'cart_id': cart_id, 'product_id': product_id, 'quantity': quantity}
+			for product_id, quantity in changes.items() if quantity > 0
+		]
+		removed = [product_id for product_id, quantity in changes.items() if quantity <= 0]
+		if upserts:
+			stmt = sqlite_insert(CartLine)
+			stmt = stmt.on_conflict_do_update(
+				index_elements=['cart_id', 'product_id'],
+				set_={'quantity': stmt.excluded.quantity, 'updated_at': func.now()}
+			)
+			db.session.execute(stmt, upserts)
+		if removed:
+			db.session.execute(
+				db.delete(CartLine).where(CartLine.cart_id == cart_id, CartLine.product_id.in_(removed))
+			)
+		db.session.execute(
+			db.update(CartLine).where(CartLine.cart_id == cart_id).values(updated_at=func.now()),
+			execution_options={'synchronize_session': False}
+		)
+		if time.monotonic() - self._last_sweep > CART_SWEEP_INTERVAL:
+			self._last_sweep = time.monotonic()
+			self.delete_expired()
+		db.session.commit()
 
+	def delete_expired(self) -> int:
+		cutoff = datetime.utcnow() - timedelta(seconds=app.config['CART_TTL'])
+		result = db.session.execute(
+			db.delete(CartLine).where(CartLine.updated_at < cutoff),
+			execution_options={'synchronize_session': False}
+		)
+		return result.rowcount
 
-def get_cart() -> CartData:
-	return session.get('cart', {})
+	def clear(self, cart_id: str) -> None:
+		db.session.execute(db.delete(CartLine).where(CartLine.cart_id == cart_id))
+		db.session.commit()
 
 
-def save_cart(cart: CartData) -> None:
-	session['cart'] = cart
-	session.modified = True
+CART_BACKENDS = {
+	'memory': lambda: MemoryCartStore(app.config['CART_MAX_ENTRIES']),
+	'sqlite': SQLiteCartStore,
+}
+cart_store = CART_BACKENDS[app.config['CART_BACKEND']]()
 
 
-def add_to_cart(product_id: int, quantity: int = 1) -> None:
-	cart = get_cart()
-	key = str(product_id)
-	cart[key] = cart.get(key, 0) + max(1, quantity)
-	save_cart(cart)
+# Inventory
+# Stock levels change with every sale, so they are read and written with
+# guarded SQL statements rather than through the catalog cache; so is whether
+# a product tracks stock at all, when a sale is made. SQLite runs each
+# statement atomically, so the guard and the write cannot interleave.
+app.config['STOCK_RESERVATION_TTL'] = int(os.environ.get('STOCK_RESERVATION_TTL', 900))
+
+
+def _held_by_other_carts(product_id: int, cart_id: str, now: datetime):
+	return (
+		db.select(func.coalesce(func.sum(StockReservation.quantity), 0))
+		.where(
+			StockReservation.product_id == product_id,
+			StockReservation.cart_id != cart_id,
+			StockReservation.expires_at > now
+		)
+		.scalar_subquery()
+	)
 
 
-def update_cart_item(product_id: int, quantity: int) -> None:
+def reserve_stock(cart_id: str, product_id: int, quantity: int) -> bool:
+	"""Hold ``quantity`` units for a cart if that many are not held by other carts."""
+	now = datetime.utcnow()
+	expires_at = now + timedelta(seconds=app.config['STOCK_RESERVATION_TTL'])
+	available = (
+		db.select(Product.stock - _held_by_other_carts(product_id, cart_id, now))
+		.where(Product.id == product_id)
+		.scalar_subquery()
+	)
+	stmt = sqlite_insert(StockReservation).from_select(
+		['cart_id', 'product_id', 'quantity', 'expires_at'],
+		db.select(
+			literal(cart_id), literal(product_id), literal(quantity), literal(expires_at, db.DateTime)
+		).where(available >= quantity)
+	)
+	stmt = stmt.on_conflict_do_update(
+		index_elements=['cart_id', 'product_id'],
+		set_={'quantity': stmt.excluded.quantity, 'expires_at': stmt.excluded.expires_at}
+	)
+	reserved = db.session.execute(stmt).rowcount > 0
+	db.session.execute(db.delete(StockReservation).where(
+		StockReservation.product_id == product_id, StockReservation.expires_at <= now
+	))
+	db.session.commit()
+	return reserved
+
+
+def release_stock(cart_id: str, product_ids: Optional[List[int]] = None) -> None:
+	"""Drop a cart's reservations (all of them, or just ``product_ids``) in the caller's transaction."""
+	stmt = db.delete(StockReservation).where(StockReservation.cart_id == cart_id)
+	if product_ids is not None:
+		stmt = stmt.where(StockReservation.product_id.in_(product_ids))
+	db.session.execute(stmt)
+
+
+def stock_tracked_ids(product_ids: Iterable[int]) -> List[int]:
+	"""Which of ``product_ids`` track stock, as of the catalog cache.
+
+	Switching a product between tracked and unlimited bumps the catalog
+	version, so this is at most one ``CATALOG_CHECK_INTERVAL`` behind. It only
+	decides whether a cart reserves units; take_stock re-checks in SQL at sale.
+	"""
+	return [pid for pid, product in catalog.get_many(product_ids).items() if product.stock_tracked]
+
+
+def take_stock(product_id: int, quantity: int, cart_id: str = '') -> bool:
+	"""Decrement stock unless that would eat into other carts' live reservations.
+
+	Call it for every line: whether the product tracks stock is decided by
+	the same statement, so a concurrent ``set-stock`` cannot slip between
+	the check and the write. Untracked products (``stock IS NULL``) always
+	succeed and stay NULL. Runs in the caller's transaction; a False return
+	means the sale must not go through.
+	"""
+	result = db.session.execute(
+		update(Product)
+		.where(
+			Product.id == product_id,
+			db.or_(
+				Product.stock.is_(None),
+				Product.stock - quantity >= _held_by_other_carts(product_id, cart_id, datetime.utcnow())
+			)
+		)
+		.values(stock=Product.stock - quantity),
+		execution_options={'synchronize_session': False}
+	)
+	return result.rowcount == 1
+
+
+# Cart helpers
+def _cart_id(create: bool = False) -> Optional[str]:
+	# The session cookie only carries this id, so its size never grows with the cart
+	cart_id = session.get('cart_id')
+	if cart_id is None and create:
+		cart_id = session['cart_id'] = secrets.token_urlsafe(16)
+	return cart_id
+
+
+def get_cart() -> CartData:
+	if 'cart' not in g:
+		legacy = session.pop('cart', None)  # cart from before server-side storage
+		if legacy:
+			cart_store.apply(_cart_id(create=True), {int(pid): int(qty) for pid, qty in legacy.items()})
+		cart_id = _cart_id()
+		g.cart = cart_store.load(cart_id) if cart_id else {}
+	return g.cart
+
+
+def apply_cart_changes(changes: CartData) -> List[int]:
+	"""Set several quantities at once (0 removes a line) in one backend write.
+
+	Stock-tracked products are reserved first; lines whose new quantity cannot
+	be reserved are left unchanged and their ids returned.
+	"""
+	if not changes:
+		return []
+	get_cart()
+	cart_id = _cart_id(create=True)
+	changes = dict(changes)
+	rejected: List[int] = []
+	for product_id in stock_tracked_ids(changes.keys()):
+		if changes[product_id] <= 0:
+			release_stock(cart_id, [product_id])
+			db.session.commit()
+		elif not reserve_stock(cart_id, product_id, changes[product_id]):
+			rejected.append(product_id)
+			del changes[product_id]
+	if changes:
+		cart_store.apply(cart_id, changes)
+	g.pop('cart', None)
+	return rejected
+
+
+def add_to_cart(product_id: int, quantity: int = 1) -> bool:
 	cart = get_cart()
-	key = str(product_id)
-	if quantity <= 0:
-		cart.pop(key, None)
-	else:
-		cart[key] = quantity
-	save_cart(cart)
+	return not apply_cart_changes({product_id: cart.get(product_id, 0) + max(1, quantity)})
+
+
+def update_cart_item(product_id: int, quantity: int) -> bool:
+	return not apply_cart_changes({product_id: max(0, quantity)})
 
 
 def clear_cart() -> None:
-	save_cart({})
+	cart_id = _cart_id()
+	if cart_id:
+		cart_store.clear(cart_id)
+		release_stock(cart_id)
+		db.session.commit()
+	g.pop('cart', None)
+
+
+def cart_item_count() -> int:
+	cart = get_cart()
+	known = catalog.get_many(cart.keys())
+	return sum(qty for pid, qty in cart.items() if pid in known)
 
 
 def compute_cart_details() -> Tuple[List[dict], Decimal]:
@@ -185,50 +974,802 @@ def compute_cart_details() -> Tuple[List[dict], Decimal]:
 	if not cart:
 		return items, total
 
-	product_ids = [int(pid) for pid in cart.keys()]
-	products = {p.id: p for p in Product.query.filter(Product.id.in_(product_ids)).all()}
-	for pid_str, qty in cart.items():
-		pid = int(pid_str)
+	products = catalog.get_many(cart.keys())
+	for pid, qty in cart.items():
 		product = products.get(pid)
 		if not product:
 			continue
-		subtotal = Decimal(product.price) * int(qty)
+		subtotal = Decimal(product.price) * qty
 		total += subtotal
 		items.append({
 			'product': product,
-			'quantity': int(qty),
+			'quantity': qty,
 			'subtotal': subtotal
 		})
 	return items, total
 
 
+# Order status progression
+ORDER_STATUSES = ['processing', 'brewing', 'out_for_delivery', 'delivered']
+# (status, seconds after the order was placed), latest stage first
+ORDER_STATUS_STAGES = [
+	('delivered', 900),
+	('out_for_delivery', 600),
+	('brewing', 300),
+]
+app.config['ORDER_STATUS_INTERVAL'] = float(os.environ.get('ORDER_STATUS_INTERVAL', 5))
+# Each open event stream holds a server thread, so only this many per process; the rest poll
+app.config['ORDER_STATUS_MAX_STREAMS'] = int(os.environ.get('ORDER_STATUS_MAX_STREAMS', 2))
+# A stream then closes and the browser reconnects, so one thread is not held for the whole order
+app.config['ORDER_STATUS_STREAM_SECONDS'] = float(os.environ.get('ORDER_STATUS_STREAM_SECONDS', 60))
+
+
+def hold_lease(name: str, ttl: float) -> bool:
+	"""Take or renew lease ``name`` for this process; True while this process holds it.
+
+	Non-holders only read the row until the lease runs out, so waiting
+	processes do not take the SQLite write lock every tick.
+	"""
+	holder = f'{socket.gethostname()}:{os.getpid()}'
+	now = datetime.utcnow()
+	current = db.session.execute(db.select(Lease.holder, Lease.expires_at).where(Lease.name == name)).first()
+	if current is not None and current.holder != holder and current.expires_at > now:
+		db.session.rollback()
+		return False
+	stmt = sqlite_insert(Lease).values(name=name, holder=holder, expires_at=now + timedelta(seconds=ttl))
+	stmt = stmt.on_conflict_do_update(
+		index_elements=['name'],
+		set_={'holder': stmt.excluded.holder, 'expires_at': stmt.excluded.expires_at},
+		where=db.or_(Lease.holder == holder, Lease.expires_at <= now)
+	)
+	held = db.session.execute(stmt).rowcount > 0
+	db.session.commit()
+	return held
+
+
+def advance_order_statuses(now: Optional[datetime] = None) -> int:
+	"""Move every due order to its current stage with one UPDATE per stage."""
+	now = now or datetime.utcnow()
+	advanced = 0
+	for status, after in ORDER_STATUS_STAGES:
+		earlier = ORDER_STATUSES[:ORDER_STATUSES.index(status)]
+		result = db.session.execute(
+			update(Order)
+			.where(Order.status.in_(earlier), Order.created_at <= now - timedelta(seconds=after))
+			.values(status=status),
+			execution_options={'synchronize_session': False}
+		)
+		advanced += result.rowcount
+	db.session.commit()
+	return advanced
+
+
+class OrderStatusStream:
+	"""Pushes order status transitions to open event streams.
+
+	A daemon thread in each serving process reads the status of every
+	watched order in a single SELECT per tick. Only the process holding the
+	``order-status-advancer`` lease also advances due orders in batched
+	UPDATEs, so N workers do not repeat the same writes. Reading back from
+	the database means transitions made by another worker process still
+	reach this process's subscribers.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._subscribers: Dict[int, List[queue.Queue]] = {}
+		self._last_status: Dict[int, str] = {}
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self) -> None:
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._run, name='order-status-advancer', daemon=True)
+				self._thread.start()
+
+	def subscribe(self, order_id: int, status: str) -> Optional[queue.Queue]:
+		"""A queue of status changes, or None if this process already serves its maximum of streams."""
+		updates: queue.Queue = queue.Queue()
+		with self._lock:
+			if sum(map(len, self._subscribers.values())) >= app.config['ORDER_STATUS_MAX_STREAMS']:
+				return None
+			self._subscribers.setdefault(order_id, []).append(updates)
+			self._last_status.setdefault(order_id, status)
+		return updates
+
+	def unsubscribe(self, order_id: int, updates: queue.Queue) -> None:
+		with self._lock:
+			listeners = self._subscribers.get(order_id, [])
+			if updates in listeners:
+				listeners.remove(updates)
+			if not listeners:
+				self._subscribers.pop(order_id, None)
+				self._last_status.pop(order_id, None)
+
+	def tick(self) -> None:
+		if hold_lease('order-status-advancer', 3 * app.config['ORDER_STATUS_INTERVAL']):
+			advance_order_statuses()
+		with self._lock:
+			watched = list(self._subscribers)
+		if not watched:
+			return
+		rows = db.session.execute(db.select(Order.id, Order.status).where(Order.id.in_(watched))).all()
+		with self._lock:
+			for order_id, status in rows:
+				if order_id in self._subscribers and self._last_status.get(order_id) != status:
+					self._last_status[order_id] = status
+					for updates in self._subscribers[order_id]:
+						updates.put(status)
+
+	def _run(self) -> None:
+		while True:
+			time.sleep(app.config['ORDER_STATUS_INTERVAL'])
+			try:
+				with app.app_context():
+					self.tick()
+			except Exception:
+				app.logger.exception('Order status advancer failed')
+
+
+status_stream = OrderStatusStream()
+
+
+# Sales rollups
+OrderLine = Tuple[int, int, Decimal]  # product_id, quantity, unit_price
+
+
+def to_cents(amount) -> int:
+	return int((Decimal(amount) * 100).quantize(Decimal('1')))
+
+
+def record_sales(day: date, orders: List[List[OrderLine]]) -> None:
+	"""Add a batch of orders to the daily rollups in the caller's transaction.
+
+	Lines are summed in Python first, so a batch costs one upsert per product
+	plus one for the day.
+	"""
+	if not orders:
+		return
+	units = revenue = 0
+	per_product: Dict[int, List[int]] = {}
+	for lines in orders:
+		for product_id, quantity, unit_price in lines:
+			cents = to_cents(unit_price) * quantity
+			units += quantity
+			revenue += cents
+			totals = per_product.setdefault(product_id, [0, 0])
+			totals[0] += quantity
+			totals[1] += cents
+
+	day_stmt = sqlite_insert(DailySales).values(day=day, orders=len(orders), units=units, revenue_cents=revenue)
+	db.session.execute(day_stmt.on_conflict_do_update(
+		index_elements=['day'],
+		set_={
+			'orders': DailySales.orders + day_stmt.excluded.orders,
+			'units': DailySales.units + day_stmt.excluded.units,
+			'revenue_cents': DailySales.revenue_cents + day_stmt.excluded.revenue_cents,
+		}
+	))
+
+	product_stmt = sqlite_insert(DailyProductSales)
+	product_stmt = product_stmt.on_conflict_do_update(
+		index_elements=['day', 'product_id'],
+		set_={
+			'units': DailyProductSales.units + product_stmt.excluded.units,
+			'revenue_cents': DailyProductSales.revenue_cents + product_stmt.excluded.revenue_cents,
+		}
+	)
+	products = catalog.get_many(per_product.keys())
+	db.session.execute(product_stmt, [
+		{
+			'day': day,
+			'product_id': product_id,
+			'category': products[product_id].category if product_id in products else 'Unknown',
+			'units': product_units,
+			'revenue_cents': product_revenue,
+		}
+		for product_id, (product_units, product_revenue) in per_product.items()
+	])
+
+
+def backfill_sales() -> int:
+	"""Rebuild both rollup tables from the order history; returns the number of days."""
+	order_day = func.date(Order.created_at)
+	line_cents = db.cast(func.round(OrderItem.unit_price * 100), db.Integer) * OrderItem.quantity
+	db.session.execute(db.delete(DailySales))
+	db.session.execute(db.delete(DailyProductSales))
+	db.session.execute(db.insert(DailySales).from_select(
+		['day', 'orders', 'units', 'revenue_cents'],
+		db.select(order_day, func.count(func.distinct(Order.id)), func.sum(OrderItem.quantity), func.sum(line_cents))
+		.join(OrderItem, OrderItem.order_id == Order.id)
+		.group_by(order_day)
+	))
+	db.session.execute(db.insert(DailyProductSales).from_select(
+		['day', 'product_id', 'category', 'units', 'revenue_cents'],
+		db.select(order_day, OrderItem.product_id, func.coalesce(Product.category, 'Unknown'),
+				  func.sum(OrderItem.quantity), func.sum(line_cents))
+		.join(OrderItem, OrderItem.order_id == Order.id)
+		.outerjoin(Product, Product.id == OrderItem.product_id)
+		.group_by(order_day, OrderItem.product_id)
+	))
+	db.session.commit()
+	return db.session.scalar(db.select(func.count()).select_from(DailySales))
+
+
+def from_cents(cents) -> Decimal:
+	return Decimal(cents or 0) / 100
+
+
+def sales_report(start: date, end: date, top_products: int = 20) -> dict:
+	"""Daily revenue, units per product and category mix, read from the rollups only."""
+	daily = db.session.execute(
+		db.select(DailySales.day, DailySales.orders, DailySales.units, DailySales.revenue_cents)
+		.where(DailySales.day.between(start, end)).order_by(DailySales.day)
+	).all()
+	revenue = func.sum(DailyProductSales.revenue_cents)
+	units = func.sum(DailyProductSales.units)
+	products = db.session.execute(
+		db.select(DailyProductSales.product_id, units, revenue)
+		.where(DailyProductSales.day.between(start, end))
+		.group_by(DailyProductSales.product_id)
+		.order_by(revenue.desc())
+		.limit(top_products)
+	).all()
+	categories = db.session.execute(
+		db.select(DailyProductSales.category, units, revenue)
+		.where(DailyProductSales.day.between(start, end))
+		.group_by(DailyProductSales.category)
+		.order_by(revenue.desc())
+	).all()
+
+	names = catalog.get_many(pid for pid, _, _ in products)
+	total_cents = sum(row.revenue_cents for row in daily)
+	return {
+		'start': start.isoformat(),
+		'end': end.isoformat(),
+		'orders': sum(row.orders for row in daily),
+		'revenue': from_cents(total_cents),
+		'daily': [
+			{'day': row.day.isoformat(), 'orders': row.orders, 'units': row.units, 'revenue': from_cents(row.revenue_cents)}
+			for row in daily
+		],
+		'products': [
+			{'product_id': pid, 'name': names[pid].name if pid in names else f'#{pid}',
+			 'units': product_units, 'revenue': from_cents(product_revenue)}
+			for pid, product_units, product_revenue in products
+		],
+		'categories': [
+			{'category': category, 'units': category_units, 'revenue': from_cents(category_revenue),
+			 'share': (category_revenue / total_cents) if total_cents else 0}
+			for category, category_units, category_revenue in categories
+		],
+	}
+
+
+def admin_required(view):
+	@wraps(view)
+	def wrapper(*args, **kwargs):
+		expected = app.config.get('ADMIN_TOKEN')
+		provided = request.headers.get('X-Admin-Token') or request.args.get('token') or ''
+		if not expected or not hmac.compare_digest(provided.encode(), expected.encode()):
+			return jsonify({'ok': False, 'error': 'Admin token required'}), 403
+		return view(*args, **kwargs)
+	return wrapper
+
+
+def report_range() -> Tuple[date, date]:
+	days = min(max(request.args.get('days', 30, type=int), 1), 3660)
+	end = datetime.utcnow().date()
+	return end - timedelta(days=days - 1), end
+
+
+# Job queue
+# Post-order side effects run here instead of inside the checkout request. Jobs
+# are inserted in the same transaction as the order, so they exist exactly when
+# the order does, and their idempotency key stops a retry from enqueueing twice.
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))  # 0: run `flask run-workers` separately (gunicorn.conf.py does)
+app.config['JOB_POLL_INTERVAL'] = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', 300))  # running longer than this is presumed dead
+
+JOB_HANDLERS: Dict[str, Callable[[dict], None]] = {}
+
+
+def job_handler(kind: str):
+	def register(fn):
+		JOB_HANDLERS[kind] = fn
+		return fn
+	return register
+
+
+def enqueue_jobs(jobs: List[Tuple[str, dict, str]]) -> None:
+	"""Queue (kind, payload, idempotency key) jobs in the caller's transaction.
+
+	A key that is already queued or done is skipped.
+	"""
+	if not jobs:
+		return
+	now = datetime.utcnow()
+	db.session.execute(
+		sqlite_insert(Job).on_conflict_do_nothing(index_elements=['idempotency_key']),
+		[
+			{'kind': kind, 'payload': json.dumps(payload), 'idempotency_key': key,
+			 'status': 'queued', 'attempts': 0, 'max_attempts': 5, 'created_at': now, 'run_after': now}
+			for kind, payload, key in jobs
+		]
+	)
+	g.jobs_enqueued = True
+
+
+def order_placed_jobs(order_id: int) -> List[Tuple[str, dict, str]]:
+	return [
+		('send_order_confirmation', {'order_id': order_id}, f'send_order_confirmation:{order_id}'),
+	]
+
+
+@job_handler('send_order_confirmation')
+def send_order_confirmation(payload: dict) -> None:
+	order = order_with_items_query().filter_by(id=payload['order_id']).first()
+	if order is None:
+		return
+	lines = ', '.join(f'{item.quantity} x {item.product.name}' for item in order.items)
+	# No mail transport is configured for the demo shop; this is where it plugs in
+	app.logger.info('Order #%s confirmation for %s: %s (%s)', order.id, order.email, lines, currency(order.total))
+
+
+def claim_job() -> Optional[Tuple[int, str, str, int, int]]:
+	"""Atomically mark the next due job as running and return it.
+
+	An idle poll is one indexed SELECT. Only when a job is due does the
+	claiming UPDATE run, since in SQLite every UPDATE takes the database
+	write lock that checkout also needs.
+	"""
+	while True:
+		now = datetime.utcnow()
+		job_id = db.session.execute(
+			db.select(Job.id)
+			.where(Job.status == 'queued', Job.run_after <= now)
+			.order_by(Job.run_after)
+			.limit(1)
+		).scalar()
+		if job_id is None:
+			db.session.rollback()  # end the read transaction
+			return None
+		row = db.session.execute(
+			update(Job)
+			.where(Job.id == job_id, Job.status == 'queued')
+			.values(status='running', attempts=Job.attempts + 1, started_at=now)
+			.returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts),
+			execution_options={'synchronize_session': False}
+		).first()
+		db.session.commit()
+		if row:
+			return tuple(row)
+		# Another worker claimed it between the SELECT and the UPDATE; look again
+
+
+def run_job(job_id: int, kind: str, payload: str, attempts: int, max_attempts: int) -> bool:
+	"""Run one claimed job and record the outcome; failures retry with backoff."""
+	try:
+		handler = JOB_HANDLERS.get(kind)
+		if handler is None:
+			raise LookupError(f'No handler for job kind {kind!r}')
+		handler(json.loads(payload))
+		values = {'finished_at': datetime.utcnow(), 'status': 'done', 'last_error': None}
+	except Exception as e:
+		db.session.rollback()
+		app.logger.exception('Job %s (%s) failed on attempt %s', job_id, kind, attempts)
+		values = {'finished_at': datetime.utcnow(), 'last_error': f'{type(e).__name__}: {e}'[:2000]}
+		if attempts < max_attempts:
+			values.update(status='queued', run_after=values['finished_at'] + timedelta(seconds=2 ** attempts))
+		else:
+			values.update(status='failed')
+	db.session.execute(
+		update(Job).where(Job.id == job_id).values(**values),
+		execution_options={'synchronize_session': False}
+	)
+	db.session.commit()
+	JOBS_FINISHED.inc((kind, values['status']))
+	return values['status'] == 'done'
+
+
+def requeue_stale_jobs() -> int:
+	cutoff = datetime.utcnow() - timedelta(seconds=app.config['JOB_TIMEOUT'])
+	result = db.session.execute(
+		update(Job)
+		.where(Job.status == 'running', Job.started_at < cutoff)
+		.values(status='queued', last_error='Timed out while running'),
+		execution_options={'synchronize_session': False}
+	)
+	db.session.commit()
+	return result.rowcount
+
+
+class JobWorkerPool:
+	"""Daemon threads that claim and run queued jobs.
+
+	Several processes may run pools against the same database: claiming is a
+	single conditional UPDATE, so each job runs once per attempt.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._threads: List[threading.Thread] = []
+		self._wake = threading.Event()
+
+	def start(self, size: int) -> None:
+		with self._lock:
+			self._threads = [t for t in self._threads if t.is_alive()]
+			for i in range(len(self._threads), size):
+				thread = threading.Thread(target=self._run, name=f'job-worker-{i}', daemon=True)
+				thread.start()
+				self._threads.append(thread)
+
+	def notify(self) -> None:
+		self._wake.set()
+
+	def _run(self) -> None:
+		last_sweep = 0.0
+		while True:
+			try:
+				with app.app_context():
+					if time.monotonic() - last_sweep > app.config['JOB_TIMEOUT']:
+						requeue_stale_jobs()
+						last_sweep = time.monotonic()
+					job = claim_job()
+					if job is not None:
+						run_job(*job)
+						continue
+			except Exception:
+				app.logger.exception('Job worker error')
+			self._wake.wait(app.config['JOB_POLL_INTERVAL'])
+			self._wake.clear()
+
+
+job_workers = JobWorkerPool()
+
+
+@app.before_request
+def _start_job_workers():
+	if app.config['JOB_WORKERS']:
+		job_workers.start(app.config['JOB_WORKERS'])
+
+
+@app.teardown_request
+def _wake_job_workers(exc):
+	if g.pop('jobs_enqueued', False) and exc is None:
+		job_workers.notify()
+
+
+def job_queue_stats() -> dict:
+	now = datetime.utcnow()
+	counts = dict(db.session.execute(db.select(Job.status, func.count()).group_by(Job.status)).all())
+	oldest_due = db.session.scalar(
+		db.select(func.min(Job.run_after)).where(Job.status == 'queued', Job.run_after <= now)
+	)
+	failures = db.session.execute(
+		db.select(Job).where(Job.status == 'failed').order_by(Job.finished_at.desc()).limit(20)
+	).scalars().all()
+	return {
+		'counts': {status: counts.get(status, 0) for status in ('queued', 'running', 'done', 'failed')},
+		'lag_seconds': (now - oldest_due).total_seconds() if oldest_due else 0.0,
+		'recent_failures': [
+			{'id': job.id, 'kind': job.kind, 'key': job.idempotency_key, 'attempts': job.attempts,
+			 'error': job.last_error, 'finished_at': job.finished_at.isoformat() if job.finished_at else None}
+			for job in failures
+		],
+	}
+
+
+# Metrics
+# Under gunicorn, METRICS_DIR (set by gunicorn.conf.py) makes /metrics sum every worker's series
+metrics_registry = Registry(os.environ.get('METRICS_DIR') or None)
+REQUEST_LATENCY = metrics_registry.register(Histogram(
+	'shop_request_duration_seconds', 'Time to build the response, by endpoint.', ['endpoint']))
+REQUESTS = metrics_registry.register(Counter(
+	'shop_requests_total', 'Requests handled, by endpoint and status code.', ['endpoint', 'status']))
+DB_QUERIES = metrics_registry.register(Histogram(
+	'shop_db_queries_per_request', 'SQL statements executed per request.', ['endpoint'],
+	buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)))
+DB_SECONDS = metrics_registry.register(Histogram(
+	'shop_db_seconds_per_request', 'Time spent executing SQL per request.', ['endpoint']))
+TEMPLATE_RENDER = metrics_registry.register(Histogram(
+	'shop_template_render_seconds', 'Jinja template render time.', ['template']))
+JOBS_FINISHED = metrics_registry.register(Counter(
+	'shop_jobs_finished_total', 'Job attempts finished, by kind and resulting status.', ['kind', 'status']))
+
+
+def _cache_counts() -> Dict[Tuple[str, ...], float]:
+	return {
+		('page', 'hit'): page_cache.hits,
+		('page', 'miss'): page_cache.misses,
+		('catalog', 'hit'): catalog.lookups - catalog.reloads,
+		('catalog', 'miss'): catalog.reloads,
+	}
+
+
+def _job_backlog() -> Dict[Tuple[str, ...], float]:
+	# Finished jobs pile up forever, so only the unfinished statuses are counted, by index range
+	statuses = ('queued', 'running', 'failed')
+	counts = dict(db.session.execute(
+		db.select(Job.status, func.count()).where(Job.status.in_(statuses)).group_by(Job.status)
+	).all())
+	return {(status,): counts.get(status, 0) for status in statuses}
+
+
+metrics_registry.register(CallbackMetric(
+	'shop_cache_requests_total', 'Lookups served by each caching layer.', 'counter',
+	['cache', 'result'], _cache_counts, per_process=True))
+metrics_registry.register(CallbackMetric(
+	'shop_job_queue_jobs', 'Background jobs waiting, running or given up on, by status.', 'gauge',
+	['status'], _job_backlog))
+
+
+@app.before_request
+def _start_request_metrics():
+	g.metrics_start = time.perf_counter()
+	g.db_queries = 0
+	g.db_seconds = 0.0
+
+
+@app.after_request
+def _record_request_metrics(response):
+	start = g.pop('metrics_start', None)
+	if start is not None:
+		endpoint = (request.endpoint or 'unmatched',)
+		REQUEST_LATENCY.observe(endpoint, time.perf_counter() - start)
+		REQUESTS.inc(endpoint + (str(response.status_code),))
+		DB_QUERIES.observe(endpoint, g.db_queries)
+		DB_SECONDS.observe(endpoint, g.db_seconds)
+	metrics_registry.start_flusher()
+	return response
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+	conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+	elapsed = time.perf_counter() - conn.info['query_start'].pop()
+	if has_request_context() and 'db_queries' in g:
+		g.db_queries += 1
+		g.db_seconds += elapsed
+
+
+@before_render_template.connect_via(app)
+def _start_template_timer(sender, template, context, **extra):
+	g.setdefault('template_starts', []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def _record_template_time(sender, template, context, **extra):
+	starts = g.get('template_starts')
+	if starts:
+		TEMPLATE_RENDER.observe((template.name or '<string>',), time.perf_counter() - starts.pop())
+
+
+# Product search
+SEARCH_TERM = re.compile(r'\w+')
+MAX_SEARCH_TERMS = 8
+# Matches ranked per query. bm25 scores every match before the top ones are known, so a
+# common prefix on a large catalog would cost time in proportion to the catalog; past this
+# many, the best of the first SEARCH_CANDIDATES matches (in rowid order) are returned.
+SEARCH_CANDIDATES = 500
+
+# External-content FTS5 index over product; the triggers keep it in sync with every write
+PRODUCT_FTS_DDL = [
+	"""CREATE VIRTUAL TABLE product_fts USING fts5(
+		name, description, content='product', content_rowid='id',
+		tokenize='porter unicode61', prefix='2 3'
+	)""",
+	"""CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+		INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+	END""",
+	"""CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+		INSERT INTO product_fts(product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+	END""",
+	"""CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description ON product BEGIN
+		INSERT INTO product_fts(product_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+		INSERT INTO product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+	END""",
+]
+app.config['SEARCH_BACKEND'] = None  # 'fts5' or 'like'; detected on first search unless ensure_search_index() ran
+
+
+def ensure_search_index() -> None:
+	"""Create the FTS5 product index and its triggers, building it from existing rows."""
+	if db.engine.dialect.name != 'sqlite':
+		return
+	exists = db.session.execute(
+		text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'")
+	).first()
+	try:
+		for i, ddl in enumerate(PRODUCT_FTS_DDL):
+			if i or not exists:
+				db.session.execute(text(ddl))
+		if not exists:
+			db.session.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+		db.session.commit()
+	except OperationalError as e:
+		db.session.rollback()
+		if 'fts5' not in str(e):
+			raise
+		# SQLite built without FTS5: keep the LIKE fallback
+		app.logger.warning('FTS5 unavailable; product search falls back to LIKE scans')
+		return
+	app.config['SEARCH_BACKEND'] = 'fts5'
+
+
+@contextmanager
+def search_index_suspended(conn):
+	"""Bulk-load products on DB-API ``conn`` without per-row index updates, then rebuild once.
+
+	Only the insert trigger is dropped; one rebuild afterwards is several times
+	faster than tokenizing row by row. Concurrent product inserts made by other
+	connections in the meantime are covered by the same rebuild.
+	"""
+	indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'product_fts_ai'").fetchone()
+	if not indexed:
+		yield
+		return
+	conn.execute('DROP TRIGGER product_fts_ai')
+	conn.commit()
+	try:
+		yield
+	finally:
+		conn.execute(PRODUCT_FTS_DDL[1])
+		conn.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+		conn.commit()
+
+
+def search_backend() -> str:
+	if app.config['SEARCH_BACKEND'] is None:
+		has_index = db.engine.dialect.name == 'sqlite' and db.session.execute(
+			text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'")
+		).first() is not None
+		app.config['SEARCH_BACKEND'] = 'fts5' if has_index else 'like'
+	return app.config['SEARCH_BACKEND']
+
+
+def _like_pattern(term: str) -> str:
+	escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+	return f'%{escaped}%'
+
+
+def search_product_ids(query: str, limit: int = 20, category: Optional[str] = None,
+					   ptype: Optional[str] = None) -> List[int]:
+	"""Ids of products matching every term as a prefix, best matches first.
+
+	``category`` and ``ptype`` filter inside the same query, so a filtered
+	search still returns up to ``limit`` results.
+	"""
+	terms = SEARCH_TERM.findall(query.lower())[:MAX_SEARCH_TERMS]
+	if not terms:
+		return []
+	if search_backend() == 'fts5':
+		params = {'match': ' '.join(f'"{term}"*' for term in terms), 'candidates': SEARCH_CANDIDATES, 'limit': limit}
+		filters = ''
+		if category:
+			filters += ' AND product.category = :category'
+			params['category'] = category
+		if ptype:
+			filters += ' AND product.product_type = :ptype'
+			params['ptype'] = ptype
+		# CROSS JOIN keeps product_fts as the outer loop; otherwise SQLite may scan every product of
+		# the category and probe the index for each. The inner LIMIT has no ORDER BY, so FTS5 stops
+		# reading matches once it has enough.
+		join = ' CROSS JOIN product ON product.id = product_fts.rowid' if filters else ''
+		return db.session.execute(
+			text('SELECT id FROM ('
+				 '  SELECT product_fts.rowid AS id, bm25(product_fts, 10.0, 1.0) AS score'
+				 f'  FROM product_fts{join} WHERE product_fts MATCH :match{filters} LIMIT :candidates'
+				 ') ORDER BY score LIMIT :limit'),
+			params
+		).scalars().all()
+	conditions = [
+		db.or_(Product.name.ilike(_like_pattern(term), escape='\\'),
+			   Product.description.ilike(_like_pattern(term), escape='\\'))
+		for term in terms
+	]
+	if category:
+		conditions.append(Product.category == category)
+	if ptype:
+		conditions.append(Product.product_type == ptype)
+	return db.session.execute(
+		db.select(Product.id).where(*conditions).order_by(Product.name).limit(limit)
+	).scalars().all()
+
+
+def search_products(query: str, limit: int = 20, category: Optional[str] = None,
+					ptype: Optional[str] = None) -> List[ProductSnapshot]:
+	ids = search_product_ids(query, limit, category, ptype)
+	products = catalog.get_many(ids)
+	return [products[pid] for pid in ids if pid in products]
+
+
+# Route queries (shared with the check-query-plans command)
+def featured_products_query():
+	return Product.query.filter_by(is_featured=True).limit(8)
+
+
+def menu_query(category: Optional[str] = None, ptype: Optional[str] = None):
+	query = Product.query
+	if category in ALL_CATEGORIES:
+		query = query.filter_by(category=category)
+	if ptype in ALL_TYPES:
+		query = query.filter_by(product_type=ptype)
+	return query.order_by(Product.category.asc(), Product.name.asc())
+
+
+def related_products_query(product):
+	return Product.query.filter(Product.category == product.category, Product.id != product.id).limit(4)
+
+
+def order_items_query(order_id: int):
+	return OrderItem.query.filter_by(order_id=order_id)
+
+
+def order_with_items_query():
+	# Order + total in one statement, then items joined to their products in one more
+	return Order.query.options(
+		undefer(Order.total),
+		selectinload(Order.items).joinedload(OrderItem.product)
+	)
+
+
 # Routes
 @app.route('/')
+@cached_page
 def index():
-	featured = Product.query.filter_by(is_featured=True).limit(8).all()
+	featured = featured_products_query().all()
 	return render_template('index.html', featured=featured)
 
 
 @app.route('/menu')
+@cached_page
 def menu():
 	category = request.args.get('category')
 	ptype = request.args.get('type')
-	query = Product.query
-	if category in ALL_CATEGORIES:
-		query = query.filter_by(category=category)
-	if ptype in ALL_TYPES:
-		query = query.filter_by(product_type=ptype)
-	products = query.order_by(Product.category.asc(), Product.name.asc()).all()
-	return render_template('menu.html', products=products, selected_category=category, selected_type=ptype)
+	search = request.args.get('q', '').strip()
+	if search:
+		products = search_products(search, limit=48, category=category if category in ALL_CATEGORIES else None,
+								   ptype=ptype if ptype in ALL_TYPES else None)
+	else:
+		products = menu_query(category, ptype).all()
+	return render_template('menu.html', products=products, selected_category=category, selected_type=ptype,
+						   search=search)
+
+
+@app.route('/api/search')
+def product_search():
+	query = request.args.get('q', '')
+	limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+	return jsonify({
+		'query': query,
+		'results': [
+			{'id': p.id, 'name': p.name, 'category': p.category, 'product_type': p.product_type,
+			 'price': p.price, 'url': url_for('product_detail', product_id=p.id)}
+			for p in search_products(query, limit)
+		]
+	})
 
 
 @app.route('/product/<int:product_id>')
+@cached_page
 def product_detail(product_id: int):
 	product = Product.query.get_or_404(product_id)
-	related = Product.query.filter(Product.category == product.category, Product.id != product.id).limit(4).all()
+	related = related_products_query(product).all()
 	return render_template('product_detail.html', product=product, related=related)
 
 
+@app.route('/fragment/session')
+def session_fragment():
+	response = jsonify({'cart_count': cart_item_count(), 'csrf_token': generate_csrf()})
+	response.cache_control.no_store = True
+	return response
+
+
 @app.route('/cart')
 def cart_view():
 	items, total = compute_cart_details()
@@ -248,14 +1789,19 @@ def cart_add():
 	data = request.get_json(silent=True) or {}
 	product_id = int((request.form.get('product_id') or data.get('product_id') or 0))
 	quantity = int((request.form.get('quantity') or data.get('quantity') or 1))
-	if product_id <= 0:
+	if product_id <= 0 or catalog.get(product_id) is None:
 		return jsonify({'ok': False, 'error': 'Invalid product'}), 400
-	add_to_cart(product_id, quantity)
+	wants_json = request.accept_mimetypes.best == 'application/json' or request.is_json
+	if not add_to_cart(product_id, quantity):
+		if wants_json:
+			return jsonify({'ok': False, 'error': 'Not enough stock'}), 409
+		flash(f'Sorry, there is not enough {catalog.get(product_id).name} left.', 'warning')
+		return redirect(request.referrer or url_for('menu'))
 	items, total = compute_cart_details()
-	if request.accept_mimetypes.best == 'application/json' or request.is_json:
+	if wants_json:
 		return jsonify({
 			'ok': True,
-			'cart_count': sum(get_cart().values()),
+			'cart_count': sum(item['quantity'] for item in items),
 			'total': str(total)
 		})
 	flash('Added to cart!', 'success')
@@ -264,6 +1810,7 @@ def cart_add():
 
 @app.route('/cart/update', methods=['POST'])
 def cart_update():
+	changes: CartData = {}
 	for key, value in request.form.items():
 		if key.startswith('qty_'):
 			try:
@@ -271,8 +1818,13 @@ def cart_update():
 				qty = int(value)
 			except Exception:
 				continue
-			update_cart_item(pid, qty)
-	flash('Cart updated', 'info')
+			changes[pid] = max(0, qty)
+	rejected = catalog.get_many(apply_cart_changes(changes))
+	if rejected:
+		names = ', '.join(p.name for p in rejected.values())
+		flash(f'Not enough stock to increase {names}; those quantities were left as they were.', 'warning')
+	else:
+		flash('Cart updated', 'info')
 	return redirect(url_for('cart_view'))
 
 
@@ -304,13 +1856,27 @@ def checkout():
 		flash('Please fill out all required fields.', 'danger')
 		return render_template('checkout.html', items=items, total=total), 400
 
+	# End the read transaction so the guarded stock writes below start from fresh data
+	db.session.commit()
+	cart_id = _cart_id() or ''
+	short = [
+		item['product'].name for item in items
+		if not take_stock(item['product'].id, item['quantity'], cart_id)
+	]
+	if short:
+		db.session.rollback()
+		flash(f"Sorry, we no longer have enough {', '.join(short)} to fill your order.", 'danger')
+		return render_template('checkout.html', items=items, total=total), 409
+
+	now = datetime.utcnow()
 	order = Order(
 		customer_name=name,
 		email=email,
 		phone=phone,
 		address=address,
 		delivery_option=delivery_option,
-		status='processing'
+		status='processing',
+		created_at=now
 	)
 	db.session.add(order)
 	db.session.flush()  # to get order.id
@@ -324,6 +1890,9 @@ def checkout():
 		)
 		db.session.add(order_item)
 
+	record_sales(now.date(), [[(item['product'].id, item['quantity'], item['product'].price) for item in items]])
+	enqueue_jobs(order_placed_jobs(order.id))
+	release_stock(cart_id)
 	db.session.commit()
 	clear_cart()
 	flash('Order placed! Your fresh brew is on the way.', 'success')
@@ -332,30 +1901,209 @@ def checkout():
 
 @app.route('/order_confirmation/<int:order_id>')
 def order_confirmation(order_id: int):
-	order = Order.query.get_or_404(order_id)
+	order = order_with_items_query().filter_by(id=order_id).first_or_404()
 	return render_template('order_confirmation.html', order=order)
 
 
 @app.route('/api/order/<int:order_id>/status')
 def order_status(order_id: int):
+	# Read-only: status_stream's background thread moves orders forward
+	status_stream.start()
+	order = Order.query.get_or_404(order_id)
+	return jsonify(order_status_payload(order.id, order.status, order.created_at))
+
+
+def order_status_payload(order_id: int, status: str, created_at: Optional[datetime]) -> dict:
+	return {
+		'id': order_id,
+		'status': status,
+		'created_at': created_at.isoformat() if created_at else None
+	}
+
+
+@app.route('/api/order/<int:order_id>/events')
+def order_status_events(order_id: int):
+	"""Server-Sent Events stream of an order's status until it is delivered.
+
+	Each response lasts at most ``ORDER_STATUS_STREAM_SECONDS``; the browser
+	then reconnects on its own. Past ``ORDER_STATUS_MAX_STREAMS`` open
+	streams the answer is 503, and the page falls back to polling
+	``order_status``.
+	"""
+	status_stream.start()
 	order = Order.query.get_or_404(order_id)
-	# Simulate status progression over time for demo
-	if order.status != 'delivered' and order.created_at:
-		elapsed = (datetime.utcnow() - order.created_at).total_seconds()
-		if elapsed > 900:
-			order.status = 'delivered'
-		elif elapsed > 600:
-			order.status = 'out_for_delivery'
-		elif elapsed > 300:
-			order.status = 'brewing'
+	order_id, status, created_at = order.id, order.status, order.created_at
+	updates = status_stream.subscribe(order_id, status)
+	if updates is None:
+		response = jsonify({'ok': False, 'error': 'Too many open status streams; poll the status endpoint'})
+		response.status_code = 503
+		response.headers['Retry-After'] = str(int(app.config['ORDER_STATUS_INTERVAL']))
+		return response
+	deadline = time.monotonic() + app.config['ORDER_STATUS_STREAM_SECONDS']
+	retry_ms = int(app.config['ORDER_STATUS_INTERVAL'] * 1000)
+
+	def events():
+		current = status
+		try:
+			yield f'retry: {retry_ms}\n\n'
+			while True:
+				payload = json.dumps(order_status_payload(order_id, current, created_at))
+				yield f'event: status\ndata: {payload}\n\n'
+				if current == 'delivered':
+					return
+				while True:
+					remaining = deadline - time.monotonic()
+					if remaining <= 0:
+						return
+					try:
+						current = updates.get(timeout=min(15, remaining))
+						break
+					except queue.Empty:
+						yield ': keep-alive\n\n'
+		finally:
+			status_stream.unsubscribe(order_id, updates)
+
+	response = Response(events(), mimetype='text/event-stream')
+	response.headers['Cache-Control'] = 'no-cache'
+	response.headers['X-Accel-Buffering'] = 'no'
+	return response
+
+
+def validate_bulk_order(payload) -> Tuple[dict, List[dict], List[str]]:
+	"""Check one kiosk order and return its order row, item rows and errors."""
+	if not isinstance(payload, dict):
+		return {}, [], ['Order must be an object']
+
+	errors: List[str] = []
+	row = {'status': 'processing'}
+	for field in ('customer_name', 'email', 'phone', 'address'):
+		value = payload.get(field)
+		row[field] = value.strip() if isinstance(value, str) else ''
+		if not row[field]:
+			errors.append(f'Missing {field}')
+	row['delivery_option'] = payload.get('delivery_option') or 'Instant Delivery'
+	if row['delivery_option'] not in DELIVERY_OPTIONS:
+		errors.append(f"Unknown delivery_option {row['delivery_option']!r}")
+
+	lines = payload.get('items')
+	if not isinstance(lines, list) or not lines:
+		return row, [], errors + ['Order has no items']
+	item_rows: List[dict] = []
+	for line in lines:
+		try:
+			product_id = int(line['product_id'])
+			quantity = int(line.get('quantity', 1))
+		except (KeyError, TypeError, ValueError, AttributeError):
+			errors.append(f'Invalid item {line!r}')
+			continue
+		product = catalog.get(product_id)
+		if product is None:
+			errors.append(f'Unknown product {product_id}')
+		elif quantity <= 0:
+			errors.append(f'Invalid quantity for product {product_id}')
+		else:
+			item_rows.append({'product_id': product_id, 'quantity': quantity, 'unit_price': product.price})
+	return row, item_rows, errors
+
+
+@app.route('/api/orders/bulk', methods=['POST'])
+@csrf.exempt  # Kiosks authenticate with an API key rather than a browser session
+def bulk_orders():
+	expected = app.config.get('KIOSK_API_KEY')
+	provided = request.headers.get('X-API-Key', '')
+	if not expected or not hmac.compare_digest(provided.encode(), expected.encode()):
+		return jsonify({'ok': False, 'error': 'Invalid API key'}), 403
+
+	data = request.get_json(silent=True)
+	orders = data.get('orders') if isinstance(data, dict) else None
+	if not isinstance(orders, list) or not orders:
+		return jsonify({'ok': False, 'error': 'Expected a non-empty "orders" list'}), 400
+	if len(orders) > MAX_BULK_ORDERS:
+		return jsonify({'ok': False, 'error': f'At most {MAX_BULK_ORDERS} orders per request'}), 400
+
+	results: List[dict] = []
+	accepted: List[Tuple[dict, dict, List[dict]]] = []
+	for index, payload in enumerate(orders):
+		row, item_rows, errors = validate_bulk_order(payload)
+		result = {'index': index, 'ok': not errors}
+		if errors:
+			result['errors'] = errors
+		else:
+			accepted.append((result, row, item_rows))
+		results.append(result)
+
+	# Stock is taken order by order; an order that cannot be filled is rejected whole
+	filled: List[Tuple[dict, dict, List[dict]]] = []
+	for result, row, item_rows in accepted:
+		taken: List[dict] = []
+		for item in item_rows:
+			if not take_stock(item['product_id'], item['quantity']):
+				break
+			taken.append(item)
+		else:
+			filled.append((result, row, item_rows))
+			continue
+		for item in taken:  # put back what this order already took
+			db.session.execute(
+				update(Product).where(Product.id == item['product_id']).values(stock=Product.stock + item['quantity']),
+				execution_options={'synchronize_session': False}
+			)
+		result.update(ok=False, errors=[f"Not enough stock for product {item['product_id']}"])
+	accepted = filled
+
+	if accepted:
+		# Two executemany-style INSERTs in one transaction, however many orders arrive
+		now = datetime.utcnow()
+		order_ids = db.session.execute(
+			insert(Order).returning(Order.id, sort_by_parameter_order=True),
+			[dict(row, created_at=now) for _, row, _ in accepted]
+		).scalars().all()
+		all_items: List[dict] = []
+		for order_id, (result, _, item_rows) in zip(order_ids, accepted):
+			result['id'] = order_id
+			all_items.extend(dict(item, order_id=order_id) for item in item_rows)
+		db.session.execute(insert(OrderItem), all_items)
+		record_sales(now.date(), [
+			[(item['product_id'], item['quantity'], item['unit_price']) for item in item_rows]
+			for _, _, item_rows in accepted
+		])
+		enqueue_jobs([job for order_id in order_ids for job in order_placed_jobs(order_id)])
 		db.session.commit()
+
 	return jsonify({
-		'id': order.id,
-		'status': order.status,
-		'created_at': order.created_at.isoformat() if order.created_at else None
+		'ok': True,
+		'created': len(accepted),
+		'failed': len(orders) - len(accepted),
+		'results': results
 	})
 
 
+@app.route('/api/reports/sales')
+@admin_required
+def sales_report_api():
+	start, end = report_range()
+	return jsonify(sales_report(start, end))
+
+
+@app.route('/reports/sales')
+@admin_required
+def sales_report_page():
+	start, end = report_range()
+	return render_template('sales_report.html', report=sales_report(start, end), days=(end - start).days + 1)
+
+
+@app.route('/api/admin/jobs')
+@admin_required
+def job_queue_api():
+	return jsonify(job_queue_stats())
+
+
+@app.route('/admin/jobs')
+@admin_required
+def job_queue_page():
+	return render_template('admin_jobs.html', stats=job_queue_stats(), workers=app.config['JOB_WORKERS'])
+
+
 @app.route('/about')
 def about():
 	return render_template('about.html')
@@ -380,14 +2128,176 @@ def healthz():
 	return {'status': 'ok'}
 
 
+@app.route('/metrics')
+def prometheus_metrics():
+	return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def ensure_indexes():
+	"""Create indexes declared on the models that an older database file lacks.
+
+	``db.create_all()`` skips tables that already exist, so databases created
+	before an index was added would otherwise never get it.
+	"""
+	for table in db.metadata.sorted_tables:
+		for index in table.indexes:
+			index.create(bind=db.engine, checkfirst=True)
+
+
+def ensure_columns():
+	"""Add nullable columns declared on the models that an older database file lacks."""
+	inspector = sa_inspect(db.engine)
+	with db.engine.begin() as conn:
+		for table in db.metadata.sorted_tables:
+			existing = {column['name'] for column in inspector.get_columns(table.name)}
+			for column in table.columns:
+				if column.name in existing or not column.nullable:
+					continue
+				column_type = column.type.compile(dialect=db.engine.dialect)
+				conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+
 def setup_db():
 	with app.app_context():
 		db.create_all()
+		ensure_columns()
+		ensure_indexes()
+		ensure_catalog_version()
+		ensure_search_index()
 		initialize_products()
 
 
-setup_db()
+def explain_query_plan(query) -> List[str]:
+	statement = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+	rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+	return [row[-1] for row in rows]
+
+
+def full_scan_steps(plan: List[str]) -> List[str]:
+	"""Plan steps that read a whole table or sort it in a temporary b-tree."""
+	return [
+		step for step in plan
+		if (step.startswith('SCAN ') and ' USING ' not in step) or 'TEMP B-TREE' in step
+	]
+
+
+@app.cli.command('init-db')
+def init_db_command():
+	"""Create or migrate the schema and add the sample menu to an empty database."""
+	setup_db()
+	click.echo(f"Initialised {db.engine.url.render_as_string(hide_password=True)}")
+
+
+@app.cli.command('seed')
+@click.option('--products', default=1000, show_default=True, help='Synthetic products to add.')
+@click.option('--orders', default=100_000, show_default=True, help='Historical orders to add.')
+@click.option('--days', default=365, show_default=True, help='Days of history the orders are spread over.')
+@click.option('--seed', 'random_seed', default=1, show_default=True, help='Random seed, for repeatable datasets.')
+@click.option('--batch-size', default=fixtures.BATCH_SIZE, show_default=True, help='Rows per insert batch and commit.')
+def seed_command(products: int, orders: int, days: int, random_seed: int, batch_size: int):
+	"""Bulk-generate synthetic products and order history for load testing."""
+	setup_db()
+	rng = random.Random(random_seed)
+	started = time.perf_counter()
+	raw = db.engine.raw_connection()
+	try:
+		conn = raw.driver_connection
+		conn.execute('PRAGMA synchronous=OFF')  # a half-written fixture database is simply regenerated
+		if products:
+			with search_index_suspended(conn):
+				fixtures.insert_products(conn, products, rng, batch_size)
+		prices = dict(conn.execute('SELECT id, price FROM product'))
+		written_orders, written_items = fixtures.insert_orders(conn, orders, prices, days, rng, batch_size) if orders else (0, 0)
+		conn.execute(f"PRAGMA synchronous={SQLITE_PRAGMAS['synchronous']}")
+	finally:
+		raw.close()
+	inserted = time.perf_counter() - started
+	rollup_days = backfill_sales() if written_orders else 0
+	rows = products + written_orders + written_items
+	click.echo(
+		f'Added {products:,} products, {written_orders:,} orders and {written_items:,} order items '
+		f'({rows:,} rows) in {inserted:.1f}s, {rows / max(inserted, 1e-9):,.0f} rows/s'
+	)
+	if rollup_days:
+		click.echo(f'Rebuilt sales rollups for {rollup_days} day(s) in {time.perf_counter() - started - inserted:.1f}s.')
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+	"""Fingerprint and precompress static files into static/dist."""
+	report = assets.build(app.static_folder)
+	for logical, sizes in sorted(report.items()):
+		variants = ', '.join(f'{name} {size:,}' for name, size in sizes.items())
+		click.echo(f'{logical} -> {asset_manifest.get(logical)} ({variants} bytes)')
+	if assets.brotli is None:
+		click.echo('brotli is not installed; built gzip variants only.')
+
+
+@app.cli.command('backfill-sales')
+def backfill_sales_command():
+	"""Rebuild the sales rollup tables from existing orders."""
+	days = backfill_sales()
+	click.echo(f'Rebuilt sales rollups for {days} day(s).')
+
+
+@app.cli.command('run-workers')
+@click.option('--workers', default=4, show_default=True, help='Worker threads in this process.')
+def run_workers_command(workers: int):
+	"""Run a dedicated job worker process (use with JOB_WORKERS=0 on web servers)."""
+	job_workers.start(workers)
+	metrics_registry.start_flusher()
+	click.echo(f'Running {workers} job worker(s); Ctrl+C to stop.')
+	try:
+		while True:
+			time.sleep(3600)
+	except KeyboardInterrupt:
+		pass
+
+
+@app.cli.command('set-stock')
+@click.argument('product_id', type=int)
+@click.argument('quantity')
+def set_stock_command(product_id: int, quantity: str):
+	"""Set a product's stock level, or "unlimited" to stop tracking it."""
+	stock = None if quantity.lower() == 'unlimited' else int(quantity)
+	if stock is not None and stock < 0:
+		raise click.BadParameter('stock cannot be negative', param_hint='QUANTITY')
+	product = db.session.get(Product, product_id)
+	if product is None:
+		raise click.ClickException(f'No product with id {product_id}')
+	product.stock = stock
+	db.session.commit()
+	click.echo(f"{product.name}: stock {'unlimited' if stock is None else stock}")
+
+
+def route_queries() -> dict:
+	"""One instance of every route query, by name, for EXPLAIN QUERY PLAN checks."""
+	sample = Product(id=1, category='Tea')
+	return {
+		'index': featured_products_query(),
+		'menu': menu_query(),
+		'menu?category': menu_query('Tea'),
+		'menu?type': menu_query(None, 'Leaves'),
+		'menu?category&type': menu_query('Coffee', 'Beans'),
+		'product_detail': Product.query.filter_by(id=1),
+		'product_detail related': related_products_query(sample),
+		'order_confirmation items': order_items_query(1),
+	}
+
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+	"""Fail if any route query falls back to a full table scan."""
+	failed = False
+	for name, query in route_queries().items():
+		plan = explain_query_plan(query)
+		bad = full_scan_steps(plan)
+		failed = failed or bool(bad)
+		click.echo(f"{'FAIL' if bad else 'ok  '} {name}: {' | '.join(plan)}")
+	if failed:
+		sys.exit(1)
 
 
 if __name__ == '__main__':
+	setup_db()
 	app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""Fingerprinted, precompressed static assets.
+
+``build()`` copies every file under ``static/`` to ``static/dist/`` with a
+content hash in its name (``styles.css`` -> ``styles.3f2a9c1b7d4e.css``) and
+writes ``.gz`` and, when the ``brotli`` package is installed, ``.br``
+siblings for text assets. ``manifest.json`` maps each logical path to its
+hashed name. Because a hashed URL changes whenever the file does, browsers
+can cache it for a year without revalidating.
+
+Files from the previous build are kept so pages rendered just before a
+deploy still resolve; anything older is removed.
+"""
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+try:
+	import brotli
+except ImportError:  # optional: without it only gzip variants are built and served
+	brotli = None
+
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.svg', '.json', '.txt', '.html', '.xml', '.ico', '.map', '.webmanifest'}
+MIN_COMPRESS_SIZE = 256
+HASH_LENGTH = 12
+
+
+def fingerprint(data: bytes) -> str:
+	return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path: str, digest: str) -> str:
+	stem, ext = os.path.splitext(path)
+	return f'{stem}.{digest}{ext}'
+
+
+def gzip_bytes(data: bytes, level: int = 6) -> bytes:
+	# mtime=0 keeps the output byte-identical across builds
+	return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data: bytes, quality: int = 5) -> Optional[bytes]:
+	return brotli.compress(data, quality=quality) if brotli is not None else None
+
+
+def _write(path: str, data: bytes) -> None:
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp = path + '.tmp'
+	with open(tmp, 'wb') as f:
+		f.write(data)
+	os.replace(tmp, path)
+
+
+def load_manifest(static_dir: str) -> Dict[str, str]:
+	try:
+		with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)) as f:
+			return json.load(f)
+	except FileNotFoundError:
+		return {}
+
+
+def build(static_dir: str) -> Dict[str, dict]:
+	"""Fingerprint and precompress every file under ``static_dir``; returns per-file sizes."""
+	dist = os.path.join(static_dir, DIST_DIR)
+	previous = load_manifest(static_dir)
+	manifest: Dict[str, str] = {}
+	report: Dict[str, dict] = {}
+
+	for root, dirs, files in os.walk(static_dir):
+		if os.path.abspath(root) == os.path.abspath(static_dir) and DIST_DIR in dirs:
+			dirs.remove(DIST_DIR)
+		for name in sorted(files):
+			source = os.path.join(root, name)
+			logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+			with open(source, 'rb') as f:
+				data = f.read()
+			target = hashed_name(logical, fingerprint(data))
+			manifest[logical] = target
+			sizes = {'raw': len(data)}
+			target_path = os.path.join(dist, target)
+			if not os.path.exists(target_path):
+				_write(target_path, data)
+			if os.path.splitext(name)[1].lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+				for suffix, compress in (('.gz', lambda d: gzip_bytes(d, 9)), ('.br', lambda d: brotli_bytes(d, 11))):
+					packed = compress(data)
+					if packed is None or len(packed) >= len(data):
+						continue
+					sizes[suffix[1:]] = len(packed)
+					if not os.path.exists(target_path + suffix):
+						_write(target_path + suffix, packed)
+			report[logical] = sizes
+
+	keep = {MANIFEST_NAME}
+	for name in list(manifest.values()) + list(previous.values()):
+		keep.update({name, name + '.gz', name + '.br'})
+	for root, _, files in os.walk(dist):
+		for name in files:
+			path = os.path.join(root, name)
+			if os.path.relpath(path, dist).replace(os.sep, '/') not in keep:
+				os.remove(path)
+	_write(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode())
+	return report
+
@@ -0,0 +1,72 @@
+"""Compare /api/orders/bulk against the same orders placed one /checkout at a time.
+
+Runs both paths in-process with Flask's test client against a throwaway
+SQLite database, so nothing touches tea_coffee_shop.db:
+
+	python bench_bulk_orders.py --orders 500
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--orders', type=int, default=500)
+	parser.add_argument('--items', type=int, default=3, help='lines per order')
+	args = parser.parse_args()
+
+	tmpdir = tempfile.mkdtemp(prefix='bench_bulk_')
+	os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+	os.environ['KIOSK_API_KEY'] = 'bench'
+	from app import app, catalog, setup_db
+
+	setup_db()
+
+	with app.app_context():
+		product_ids = list(catalog.get_many(range(1, 10_000)).keys())
+	rng = random.Random(42)
+	orders = [{
+		'customer_name': f'Kiosk customer {i}',
+		'email': f'kiosk{i}@example.com',
+		'phone': '555-0100',
+		'address': f'{i} Kiosk Street',
+		'delivery_option': 'Instant Delivery',
+		'items': [{'product_id': rng.choice(product_ids), 'quantity': rng.randint(1, 3)} for _ in range(args.items)],
+	} for i in range(args.orders)]
+
+	client = app.test_client()
+	page = client.get('/about').get_data(as_text=True)
+	token = re.search(r'name="csrf-token" content="([^"]+)"', page).group(1)
+
+	start = time.perf_counter()
+	for order in orders:
+		for line in order['items']:
+			client.post('/cart/add', json=line, headers={'X-CSRFToken': token})
+		resp = client.post('/checkout', data={
+			'csrf_token': token,
+			'name': order['customer_name'],
+			'email': order['email'],
+			'phone': order['phone'],
+			'address': order['address'],
+			'delivery_option': order['delivery_option'],
+		})
+		assert resp.status_code == 302, resp.status_code
+	sequential = time.perf_counter() - start
+
+	start = time.perf_counter()
+	resp = client.post('/api/orders/bulk', json={'orders': orders}, headers={'X-API-Key': 'bench'})
+	bulk = time.perf_counter() - start
+	body = resp.get_json()
+	assert resp.status_code == 200 and body['created'] == len(orders), body
+
+	print(f'{args.orders} orders x {args.items} items')
+	print(f'  sequential /checkout : {sequential:8.3f}s  {args.orders / sequential:10.1f} orders/s')
+	print(f'  /api/orders/bulk     : {bulk:8.3f}s  {args.orders / bulk:10.1f} orders/s  ({sequential / bulk:.1f}x)')
+
+
+if __name__ == '__main__':
+	main()
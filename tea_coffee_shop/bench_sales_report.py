@@ -0,0 +1,88 @@
+"""Compare the rollup-backed sales report with ad-hoc GROUP BY queries over all orders.
+
+Builds a throwaway SQLite database with synthetic order history (nothing
+touches tea_coffee_shop.db), rebuilds the rollups with the same code as
+`flask backfill-sales`, then times both ways of producing a 30-day and a
+365-day report:
+
+	python bench_sales_report.py --orders 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import fixtures
+
+
+def generate_orders(path: str, n_orders: int, product_prices: dict, days: int, seed: int = 7) -> None:
+	conn = sqlite3.connect(path)
+	conn.execute('PRAGMA synchronous=OFF')
+	fixtures.insert_orders(conn, n_orders, product_prices, days, random.Random(seed))
+	conn.close()
+
+
+ADHOC_QUERIES = {
+	'daily': '''
+		SELECT date(o.created_at) AS day, COUNT(DISTINCT o.id), SUM(i.quantity), SUM(i.unit_price * i.quantity)
+		FROM "order" o JOIN order_item i ON i.order_id = o.id
+		WHERE date(o.created_at) BETWEEN :start AND :end GROUP BY day ORDER BY day''',
+	'products': '''
+		SELECT i.product_id, SUM(i.quantity), SUM(i.unit_price * i.quantity) AS revenue
+		FROM "order" o JOIN order_item i ON i.order_id = o.id
+		WHERE date(o.created_at) BETWEEN :start AND :end GROUP BY i.product_id ORDER BY revenue DESC LIMIT 20''',
+	'categories': '''
+		SELECT p.category, SUM(i.quantity), SUM(i.unit_price * i.quantity) AS revenue
+		FROM "order" o JOIN order_item i ON i.order_id = o.id JOIN product p ON p.id = i.product_id
+		WHERE date(o.created_at) BETWEEN :start AND :end GROUP BY p.category ORDER BY revenue DESC''',
+}
+
+
+def timed(fn, repeat: int = 3) -> float:
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--orders', type=int, default=1_000_000)
+	parser.add_argument('--days', type=int, default=730, help='span of order history')
+	args = parser.parse_args()
+
+	path = os.path.join(tempfile.mkdtemp(prefix='bench_sales_'), 'bench.db')
+	os.environ['DATABASE_URL'] = 'sqlite:///' + path
+	from app import app, db, Product, backfill_sales, sales_report, setup_db
+
+	setup_db()
+
+	with app.app_context():
+		prices = {p.id: float(p.price) for p in Product.query.all()}
+
+	start = time.perf_counter()
+	generate_orders(path, args.orders, prices, args.days)
+	print(f'generated {args.orders:,} orders in {time.perf_counter() - start:.1f}s ({os.path.getsize(path) / 1e6:.0f} MB)')
+
+	with app.app_context():
+		start = time.perf_counter()
+		days = backfill_sales()
+		print(f'backfill-sales: {days} days of rollups in {time.perf_counter() - start:.1f}s')
+
+		end = datetime.utcnow().date()
+		for window in (30, 365):
+			first = end - timedelta(days=window - 1)
+			params = {'start': first.isoformat(), 'end': end.isoformat()}
+			conn = db.session.connection()
+			adhoc = timed(lambda: [conn.exec_driver_sql(sql, params).all() for sql in ADHOC_QUERIES.values()])
+			rollup = timed(lambda: sales_report(first, end))
+			print(f'{window:>3}-day report: ad-hoc GROUP BY {adhoc * 1000:9.1f}ms   rollups {rollup * 1000:7.2f}ms   ({adhoc / rollup:,.0f}x)')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,68 @@
+"""Product search latency as the catalog grows: FTS5 index vs a LIKE scan.
+
+Fills a throwaway SQLite database (nothing touches tea_coffee_shop.db) with
+synthetic products in steps up to --products, and at each size times the same
+queries through both search backends:
+
+	python bench_search.py --products 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import fixtures
+
+
+QUERIES = ['darjeeling', 'smoky assam', 'carda', 'velvet espresso cocoa', 'berry roast', 'zzzz']
+
+
+def add_products(path: str, count: int, rng: random.Random) -> None:
+	conn = sqlite3.connect(path)
+	fixtures.insert_products(conn, count, rng)
+	conn.close()
+
+
+def best_of(fn, repeat: int = 5) -> float:
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--products', type=int, default=100_000)
+	args = parser.parse_args()
+
+	path = os.path.join(tempfile.mkdtemp(prefix='bench_search_'), 'bench.db')
+	os.environ['DATABASE_URL'] = 'sqlite:///' + path
+	from app import app, db, Product, search_product_ids, setup_db
+
+	setup_db()
+
+	rng = random.Random(11)
+	sizes = [size for size in (1_000, 10_000, 100_000, 1_000_000) if size < args.products] + [args.products]
+	print(f"{'products':>10} {'backend':>8} " + ' '.join(f'{q[:14]:>15}' for q in QUERIES))
+	with app.app_context():
+		if app.config['SEARCH_BACKEND'] != 'fts5':
+			print('SQLite has no FTS5 here; only the LIKE path can be measured.')
+		for size in sizes:
+			current = db.session.scalar(db.select(db.func.max(Product.id))) or 0
+			add_products(path, size - current, rng)
+			db.session.remove()
+			for backend in ('fts5', 'like'):
+				if backend == 'fts5' and app.config['SEARCH_BACKEND'] != 'fts5':
+					continue
+				saved, app.config['SEARCH_BACKEND'] = app.config['SEARCH_BACKEND'], backend
+				timings = [best_of(lambda: search_product_ids(q, 20)) * 1000 for q in QUERIES]
+				app.config['SEARCH_BACKEND'] = saved
+				print(f'{size:>10,} {backend:>8} ' + ' '.join(f'{t:13.2f}ms' for t in timings))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,144 @@
+"""Synthetic catalog and order history for load tests and benchmarks.
+
+Rows are written with plain ``executemany`` on a DB-API connection in
+batches, one commit per batch, so a million rows take seconds rather than
+the minutes the ORM would need. The distributions are meant to look like a
+real shop, not to be uniform noise:
+
+- product popularity follows a Zipf-like curve, so a few products dominate
+  sales and the long tail sells rarely;
+- orders cluster around the morning and afternoon rushes and weekends are
+  busier than weekdays;
+- most orders have one or two lines of one or two units each.
+
+``flask --app app seed`` is the entry point; the benchmark scripts call the
+same functions against their throwaway databases.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+ADJECTIVES = ['Smoky', 'Bright', 'Velvet', 'Golden', 'Wild', 'Roasted', 'Spiced', 'Floral', 'Honeyed', 'Dark']
+ORIGINS = ['Assam', 'Darjeeling', 'Yunnan', 'Kenyan', 'Sumatra', 'Guatemalan', 'Uji', 'Ceylon', 'Nilgiri', 'Kona']
+# (category, product_type, noun, typical price)
+KINDS = [
+	('Tea', 'Leaves', 'tea', 4.5), ('Tea', 'Fresh Brew', 'chai', 3.5), ('Tea', 'Instant', 'tea mix', 2.5),
+	('Coffee', 'Beans', 'roast', 9.0), ('Coffee', 'Fresh Brew', 'espresso', 3.5), ('Coffee', 'Instant', 'coffee', 2.5),
+]
+KIND_WEIGHTS = [25, 20, 5, 25, 20, 5]
+NOTES = ['caramel', 'citrus', 'malt', 'berry', 'cocoa', 'jasmine', 'ginger', 'cardamom', 'hazelnut', 'vanilla',
+		 'stone fruit', 'toffee', 'pine', 'bergamot', 'molasses', 'plum']
+
+FIRST_NAMES = ['Asha', 'Ben', 'Chen', 'Dara', 'Elif', 'Farah', 'Gus', 'Hana', 'Ivan', 'Jo', 'Kofi', 'Lena',
+			   'Mateo', 'Nia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Tariq', 'Uma', 'Vik', 'Wen', 'Yara']
+LAST_NAMES = ['Reddy', 'Smith', 'Okafor', 'Garcia', 'Kim', 'Novak', 'Silva', 'Haddad', 'Ito', 'Murphy', 'Rao', 'Berg']
+STREETS = ['Main St', 'Market St', 'Station Rd', 'Park Ave', 'Mill Lane', 'Church St', 'High St', 'River Rd']
+DELIVERY_WEIGHTS = {'Instant Delivery': 60, 'Fresh Brew': 25, 'Contactless Delivery': 15}
+
+# Relative order volume by hour of day (local time) and by weekday (Monday first)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 6, 14, 18, 14, 9, 8, 10, 9, 8, 11, 12, 9, 6, 5, 4, 3, 2, 1]
+WEEKDAY_WEIGHTS = [10, 10, 10, 10, 11, 14, 13]
+LINES_PER_ORDER = ([1, 2, 3, 4, 5], [45, 30, 15, 7, 3])
+UNITS_PER_LINE = ([1, 2, 3, 4], [70, 20, 7, 3])
+
+BATCH_SIZE = 50_000
+
+
+def _cumulative(weights: Sequence[float]) -> List[float]:
+	total, out = 0.0, []
+	for weight in weights:
+		total += weight
+		out.append(total)
+	return out
+
+
+def _next_id(conn, table: str) -> int:
+	return conn.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{table}"').fetchone()[0]
+
+
+def product_rows(start_id: int, count: int, rng: random.Random) -> List[tuple]:
+	"""Rows for the ``product`` table: (id, name, category, product_type, price, description, is_featured)."""
+	kinds = rng.choices(KINDS, KIND_WEIGHTS, k=count)
+	rows = []
+	for product_id, (category, ptype, noun, typical) in zip(range(start_id, start_id + count), kinds):
+		name = f'{rng.choice(ADJECTIVES)} {rng.choice(ORIGINS)} {noun.title()} No. {product_id}'
+		description = f"{name} with notes of {', '.join(rng.sample(NOTES, 3))}."
+		price = round(min(max(rng.lognormvariate(0, 0.35) * typical, 1.0), 60.0), 2)
+		rows.append((product_id, name, category, ptype, price, description, rng.random() < 0.01))
+	return rows
+
+
+def insert_products(conn, count: int, rng: random.Random, batch_size: int = BATCH_SIZE) -> int:
+	"""Append ``count`` generated products after the current max id; returns the first new id."""
+	first_id = _next_id(conn, 'product')
+	for offset in range(0, count, batch_size):
+		rows = product_rows(first_id + offset, min(batch_size, count - offset), rng)
+		conn.executemany(
+			'INSERT INTO product (id, name, category, product_type, price, description, is_featured) '
+			'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+		conn.commit()
+	return first_id
+
+
+def insert_orders(conn, count: int, product_prices: Dict[int, float], days: int, rng: random.Random,
+				  batch_size: int = BATCH_SIZE, end: Optional[datetime] = None) -> Tuple[int, int]:
+	"""Append ``count`` delivered orders spread over the ``days`` before ``end``.
+
+	Returns ``(orders, order_items)`` written.
+	"""
+	product_ids = list(product_prices)
+	rng.shuffle(product_ids)  # popularity rank is independent of id
+	product_cum = _cumulative([1.0 / (rank + 1) ** 1.1 for rank in range(len(product_ids))])
+	end = end or datetime.utcnow()
+	first_day = (end - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+	day_starts = [first_day + timedelta(days=d) for d in range(days)]
+	day_cum = _cumulative([WEEKDAY_WEIGHTS[day.weekday()] for day in day_starts])
+	hour_cum = _cumulative(HOUR_WEIGHTS)
+	lines_values, lines_cum = LINES_PER_ORDER[0], _cumulative(LINES_PER_ORDER[1])
+	units_values, units_cum = UNITS_PER_LINE[0], _cumulative(UNITS_PER_LINE[1])
+	delivery_values, delivery_cum = list(DELIVERY_WEIGHTS), _cumulative(DELIVERY_WEIGHTS.values())
+
+	# Repeat customers: a fixed pool, so per-customer queries see realistic order counts
+	customers = []
+	for n in range(max(1, min(count // 20, 50_000))):
+		name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+		customers.append((name, f"{name.lower().replace(' ', '.')}{n}@example.com",
+						  f'555-{rng.randrange(10000):04d}', f'{rng.randint(1, 999)} {rng.choice(STREETS)}'))
+	day_labels = [day.strftime('%Y-%m-%d') for day in day_starts]
+	end_label = end.strftime('%Y-%m-%d %H:%M:%S')
+	random_ = rng.random
+
+	next_order_id = _next_id(conn, 'order')
+	items_written = 0
+	for offset in range(0, count, batch_size):
+		n = min(batch_size, count - offset)
+		days_drawn = rng.choices(day_labels, cum_weights=day_cum, k=n)
+		hours_drawn = rng.choices(range(24), cum_weights=hour_cum, k=n)
+		line_counts = rng.choices(lines_values, cum_weights=lines_cum, k=n)
+		deliveries = rng.choices(delivery_values, cum_weights=delivery_cum, k=n)
+		buyers = rng.choices(customers, k=n)
+		total_lines = sum(line_counts)
+		products_drawn = rng.choices(product_ids, cum_weights=product_cum, k=total_lines)
+		units_drawn = rng.choices(units_values, cum_weights=units_cum, k=total_lines)
+		orders, items = [], []
+		line = 0
+		for i in range(n):
+			order_id = next_order_id + offset + i
+			second = int(random_() * 3600)
+			created = f'{days_drawn[i]} {hours_drawn[i]:02d}:{second // 60:02d}:{second % 60:02d}'
+			orders.append((order_id, *buyers[i], deliveries[i], 'delivered', min(created, end_label)))
+			seen = set()
+			last = line + line_counts[i]
+			for product_id, quantity in zip(products_drawn[line:last], units_drawn[line:last]):
+				if product_id not in seen:  # a repeated draw just means a bigger line, keep one
+					seen.add(product_id)
+					items.append((order_id, product_id, quantity, product_prices[product_id]))
+			line = last
+		conn.executemany(
+			'INSERT INTO "order" (id, customer_name, email, phone, address, delivery_option, status, created_at) '
+			'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', orders)
+		conn.executemany('INSERT INTO order_item (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)', items)
+		conn.commit()
+		items_written += len(items)
+	return count, items_written
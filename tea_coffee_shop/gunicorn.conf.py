@@ -0,0 +1,39 @@
+import glob
+import multiprocessing
+import os
+import tempfile
+
+
+# In-memory carts are per process; share them across workers through the database
+os.environ.setdefault('CART_BACKEND', 'sqlite')
+# Job consumers in every worker would poll the queue N times over; run `flask --app app run-workers` instead
+os.environ.setdefault('JOB_WORKERS', '0')
+# Workers write their metrics here and /metrics sums them, whichever worker answers the scrape
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'tea_coffee_shop_metrics'))
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+timeout = 30
+keepalive = 5
+max_requests = 2000
+max_requests_jitter = 200
+
+# Import the app and its libraries once in the master, so workers fork with them loaded and
+# an import error stops the server at startup. Importing does not touch the database: the
+# schema and the sample menu are created by `flask --app app init-db`, run before starting
+preload_app = True
+
+
+def on_starting(server):
+	# Counters restart with the server; files left by a previous run would be added on top
+	for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], '*.json')):
+		os.remove(path)
+
+
+def post_fork(server, worker):
+	# Pooled connections opened while preloading must not be shared across processes
+	from app import app, db
+	with app.app_context():
+		db.engine.dispose(close=False)
@@ -0,0 +1,154 @@
+"""Small concurrent load generator for the shop.
+
+Runs reader threads against /menu while writer threads place orders through
+/checkout, then reports requests per second and latency for each group.
+Run it once against the development server and once against the production
+entry point to compare:
+
+	python app.py                                   # before
+	python loadtest.py --url http://localhost:5000
+
+	gunicorn -c gunicorn.conf.py wsgi:application   # after
+	python loadtest.py --url http://localhost:8000
+"""
+import argparse
+import http.cookiejar
+import json
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Tuple
+
+
+CSRF_META = re.compile(r'name="csrf-token" content="([^"]+)"')
+
+
+class Client:
+	"""One browser-like session: its own cookie jar and CSRF token."""
+
+	def __init__(self, base_url: str):
+		self.base_url = base_url.rstrip('/')
+		self.opener = urllib.request.build_opener(
+			urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+			NoRedirect()
+		)
+		self.csrf_token = None
+
+	def request(self, path: str, data: bytes = None, headers: Dict[str, str] = None) -> Tuple[int, bytes]:
+		req = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+		try:
+			with self.opener.open(req, timeout=30) as resp:
+				return resp.status, resp.read()
+		except urllib.error.HTTPError as e:
+			return e.code, e.read()
+
+	def refresh_csrf(self) -> None:
+		_, body = self.request('/about')
+		match = CSRF_META.search(body.decode('utf-8', 'replace'))
+		self.csrf_token = match.group(1) if match else ''
+
+	def place_order(self, product_id: int) -> int:
+		if self.csrf_token is None:
+			self.refresh_csrf()
+		self.request(
+			'/cart/add',
+			data=json.dumps({'product_id': product_id, 'quantity': 1}).encode(),
+			headers={'Content-Type': 'application/json', 'Accept': 'application/json', 'X-CSRFToken': self.csrf_token}
+		)
+		form = urllib.parse.urlencode({
+			'csrf_token': self.csrf_token,
+			'name': 'Load Test',
+			'email': 'load@example.com',
+			'phone': '555-0100',
+			'address': '1 Benchmark Way',
+			'delivery_option': 'Instant Delivery',
+		}).encode()
+		status, _ = self.request('/checkout', data=form)
+		return status
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+	def redirect_request(self, req, fp, code, msg, headers, newurl):
+		return None
+
+
+def run_group(name: str, n_threads: int, duration: float, work) -> dict:
+	latencies: List[float] = []
+	errors = [0]
+	lock = threading.Lock()
+	deadline = time.perf_counter() + duration
+
+	def worker(idx: int):
+		local: List[float] = []
+		local_errors = 0
+		state = {}
+		while time.perf_counter() < deadline:
+			start = time.perf_counter()
+			try:
+				ok = work(idx, state)
+			except Exception:
+				ok = False
+			local.append(time.perf_counter() - start)
+			if not ok:
+				local_errors += 1
+		with lock:
+			latencies.extend(local)
+			errors[0] += local_errors
+
+	threads = [threading.Thread(target=worker, args=(i,), name=f'{name}-{i}') for i in range(n_threads)]
+	return {'name': name, 'threads': threads, 'latencies': latencies, 'errors': errors}
+
+
+def summarize(group: dict, elapsed: float) -> str:
+	lat = sorted(group['latencies'])
+	if not lat:
+		return f"{group['name']:>8}: no requests completed"
+	p50 = lat[len(lat) // 2] * 1000
+	p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000
+	return (f"{group['name']:>8}: {len(lat) / elapsed:8.1f} req/s  "
+			f"n={len(lat):<6} errors={group['errors'][0]:<4} "
+			f"mean={statistics.mean(lat) * 1000:6.1f}ms  p50={p50:6.1f}ms  p95={p95:6.1f}ms")
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--url', default='http://localhost:5000')
+	parser.add_argument('--readers', type=int, default=16, help='threads hitting /menu')
+	parser.add_argument('--writers', type=int, default=4, help='threads placing orders via /checkout')
+	parser.add_argument('--duration', type=float, default=15.0, help='seconds to run')
+	args = parser.parse_args()
+
+	def read(idx, state):
+		client = state.setdefault('client', Client(args.url))
+		status, _ = client.request('/menu')
+		return status == 200
+
+	def write(idx, state):
+		client = state.setdefault('client', Client(args.url))
+		state['n'] = state.get('n', 0) + 1
+		return client.place_order(1 + (idx + state['n']) % 14) == 302
+
+	groups = [run_group('menu', args.readers, args.duration, read)]
+	if args.writers:
+		groups.append(run_group('checkout', args.writers, args.duration, write))
+
+	start = time.perf_counter()
+	for group in groups:
+		for t in group['threads']:
+			t.start()
+	for group in groups:
+		for t in group['threads']:
+			t.join()
+	elapsed = time.perf_counter() - start
+
+	print(f"{args.url}  readers={args.readers} writers={args.writers} duration={elapsed:.1f}s")
+	for group in groups:
+		print(summarize(group, elapsed))
+
+
+if __name__ == '__main__':
+	main()
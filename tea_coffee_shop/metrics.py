@@ -0,0 +1,237 @@
+"""Minimal Prometheus text-format metrics for the shop.
+
+Counters and histograms live in this process and are guarded by one lock
+each. An observation is a dict lookup, a bisect and a couple of additions,
+which is cheap enough to leave enabled in production.
+
+Under a multi-process server, give the Registry a directory. Each process
+then writes its series to ``<directory>/<pid>.json``, and a scrape sums all
+the files, so it reports the whole server whichever worker answers it.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+	if not names:
+		return ''
+	pairs = []
+	for name, value in zip(names, values):
+		escaped = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+		pairs.append(f'{name}="{escaped}"')
+	return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+	if value == float('inf'):
+		return '+Inf'
+	return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+	per_process = True
+
+	def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self._lock = threading.Lock()
+		self._values: Dict[LabelValues, float] = {}
+
+	def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+		with self._lock:
+			self._values[labels] = self._values.get(labels, 0) + amount
+
+	def snapshot(self) -> Dict[LabelValues, float]:
+		with self._lock:
+			return dict(self._values)
+
+	@staticmethod
+	def merge(a: float, b: float) -> float:
+		return a + b
+
+	def collect(self, values: Optional[Dict[LabelValues, float]] = None) -> Iterable[str]:
+		yield f'# HELP {self.name} {self.documentation}'
+		yield f'# TYPE {self.name} counter'
+		for labels, value in sorted((self.snapshot() if values is None else values).items()):
+			yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Histogram:
+	per_process = True
+
+	def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+				 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(sorted(buckets))
+		self._lock = threading.Lock()
+		# labels -> [per-bucket counts (last one is +Inf), sum]
+		self._series: Dict[LabelValues, list] = {}
+
+	def observe(self, labels: LabelValues, value: float) -> None:
+		index = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(labels)
+			if series is None:
+				series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+			series[0][index] += 1
+			series[1] += value
+
+	def snapshot(self) -> Dict[LabelValues, list]:
+		with self._lock:
+			return {labels: [list(counts), total] for labels, (counts, total) in self._series.items()}
+
+	@staticmethod
+	def merge(a: list, b: list) -> list:
+		return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1]]
+
+	def collect(self, values: Optional[Dict[LabelValues, list]] = None) -> Iterable[str]:
+		yield f'# HELP {self.name} {self.documentation}'
+		yield f'# TYPE {self.name} histogram'
+		bucket_labels = self.labelnames + ('le',)
+		for labels, (counts, total) in sorted((self.snapshot() if values is None else values).items()):
+			cumulative = 0
+			for bound, count in zip(self.buckets + (float('inf'),), counts):
+				cumulative += count
+				le = _format_value(bound) if bound == float('inf') else repr(bound)
+				yield f'{self.name}_bucket{_format_labels(bucket_labels, labels + (le,))} {cumulative}'
+			yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}'
+			yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}'
+
+
+class CallbackMetric:
+	"""A counter or gauge whose values are read from ``callback`` at scrape time.
+
+	``per_process`` callbacks report this process only (in-memory cache
+	hits, say) and are summed across processes like counters. The others
+	read shared state, such as the database, and are called once per scrape.
+	"""
+
+	def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str],
+				 callback: Callable[[], Dict[LabelValues, float]], per_process: bool = False) -> None:
+		self.name = name
+		self.documentation = documentation
+		self.kind = kind
+		self.labelnames = tuple(labelnames)
+		self.callback = callback
+		self.per_process = per_process
+
+	def snapshot(self) -> Dict[LabelValues, float]:
+		return self.callback()
+
+	merge = staticmethod(Counter.merge)
+
+	def collect(self, values: Optional[Dict[LabelValues, float]] = None) -> Iterable[str]:
+		yield f'# HELP {self.name} {self.documentation}'
+		yield f'# TYPE {self.name} {self.kind}'
+		for labels, value in sorted((self.snapshot() if values is None else values).items()):
+			yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+def _read_series(path: str) -> Dict[str, Dict[LabelValues, object]]:
+	try:
+		with open(path) as f:
+			raw = json.load(f)
+	except (FileNotFoundError, ValueError):  # gone, or caught mid-replace on a filesystem without atomic rename
+		return {}
+	return {name: {tuple(labels): value for labels, value in series} for name, series in raw.items()}
+
+
+class Registry:
+	"""The metrics of this process, optionally shared with sibling processes.
+
+	With a ``directory``, ``flush()`` writes this process's per-process
+	series to ``<directory>/<pid>.json``. ``start_flusher()`` (the app calls
+	it on every request; after the first call in a process it is a pid
+	comparison) runs a daemon thread that flushes every ``flush_interval``
+	seconds, so idle workers publish their last requests too. ``render()``
+	flushes and then sums every file. Files of
+	exited workers are kept, so counters never go backwards when gunicorn
+	recycles a worker. A process that reuses a pid adds the old file's values
+	to its own. Clear the directory when the server starts.
+	"""
+
+	def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0) -> None:
+		self._metrics: List = []
+		self.directory = directory
+		self.flush_interval = flush_interval
+		self._lock = threading.Lock()
+		self._pid: Optional[int] = None
+		self._inherited: Dict[str, Dict[LabelValues, object]] = {}
+		self._flusher_pid: Optional[int] = None
+
+	def register(self, metric):
+		self._metrics.append(metric)
+		return metric
+
+	def start_flusher(self) -> None:
+		# Threads do not survive fork, so each worker starts its own on first use
+		if self.directory is None or self._flusher_pid == os.getpid():
+			return
+		with self._lock:
+			if self._flusher_pid != os.getpid():
+				self._flusher_pid = os.getpid()
+				threading.Thread(target=self._flush_forever, name='metrics-flusher', daemon=True).start()
+
+	def _flush_forever(self) -> None:
+		while True:
+			time.sleep(self.flush_interval)
+			try:
+				self.flush()
+			except OSError:
+				pass  # a full or missing disk costs this round of metrics, not the worker
+
+	def flush(self) -> None:
+		if self.directory is None:
+			return
+		with self._lock:
+			path = os.path.join(self.directory, f'{os.getpid()}.json')
+			if self._pid != os.getpid():
+				# First flush in this process: a file already under this pid was left by an exited one
+				self._pid = os.getpid()
+				self._inherited = _read_series(path)
+			data = {}
+			for metric in self._metrics:
+				if not metric.per_process:
+					continue
+				series = dict(self._inherited.get(metric.name, {}))
+				for labels, value in metric.snapshot().items():
+					series[labels] = metric.merge(series[labels], value) if labels in series else value
+				data[metric.name] = [[list(labels), value] for labels, value in series.items()]
+			os.makedirs(self.directory, exist_ok=True)
+			tmp = f'{path}.tmp'
+			with open(tmp, 'w') as f:
+				json.dump(data, f)
+			os.replace(tmp, path)
+
+	def _merged(self) -> Dict[str, Dict[LabelValues, object]]:
+		self.flush()
+		metrics = {metric.name: metric for metric in self._metrics if metric.per_process}
+		merged: Dict[str, Dict[LabelValues, object]] = {name: {} for name in metrics}
+		for path in glob.glob(os.path.join(self.directory, '*.json')):
+			for name, series in _read_series(path).items():
+				if name not in metrics:
+					continue
+				target = merged[name]
+				for labels, value in series.items():
+					target[labels] = metrics[name].merge(target[labels], value) if labels in target else value
+		return merged
+
+	def render(self) -> str:
+		merged = self._merged() if self.directory is not None else {}
+		lines: List[str] = []
+		for metric in self._metrics:
+			lines.extend(metric.collect(merged.get(metric.name) if metric.per_process else None))
+		return '\n'.join(lines) + '\n'
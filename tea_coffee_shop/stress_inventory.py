@@ -0,0 +1,126 @@
+"""Hammer one stock-tracked product from many concurrent shoppers and check it never oversells.
+
+Each thread is a separate shopper with its own test client: it adds the
+product to its cart (which reserves stock), then checks out. Kiosk bulk
+orders for the same product run alongside. Afterwards the script checks
+that units sold plus units left equals the starting stock and that stock
+never went negative. Runs against a throwaway SQLite database:
+
+	python stress_inventory.py --stock 50 --shoppers 40
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--stock', type=int, default=50)
+	parser.add_argument('--shoppers', type=int, default=40, help='concurrent shopper threads')
+	parser.add_argument('--rounds', type=int, default=3, help='add-and-checkout attempts per shopper')
+	parser.add_argument('--kiosk-orders', type=int, default=20, help='single-order bulk requests run alongside')
+	parser.add_argument('--product', type=int, default=1)
+	args = parser.parse_args()
+
+	tmpdir = tempfile.mkdtemp(prefix='stress_inventory_')
+	os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'stress.db')
+	os.environ['KIOSK_API_KEY'] = 'stress'
+	os.environ.setdefault('JOB_WORKERS', '0')
+	from app import app, db, Product, OrderItem, Order, setup_db
+
+	setup_db()
+
+	with app.app_context():
+		db.session.get(Product, args.product).stock = args.stock
+		db.session.commit()
+
+	outcomes = {'added': 0, 'refused': 0, 'checked_out': 0, 'short': 0, 'kiosk_ok': 0, 'kiosk_short': 0, 'errors': []}
+	lock = threading.Lock()
+	start_gate = threading.Barrier(args.shoppers + 1)
+
+	def record(key, value=1):
+		with lock:
+			if key == 'errors':
+				outcomes['errors'].append(value)
+			else:
+				outcomes[key] += value
+
+	def shopper(n: int):
+		rng = random.Random(n)
+		client = app.test_client()
+		page = client.get('/about').get_data(as_text=True)
+		token = re.search(r'name="csrf-token" content="([^"]+)"', page).group(1)
+		start_gate.wait()
+		for _ in range(args.rounds):
+			resp = client.post('/cart/add', json={'product_id': args.product, 'quantity': rng.randint(1, 3)},
+							   headers={'X-CSRFToken': token})
+			if resp.status_code == 409:
+				record('refused')
+				continue
+			if resp.status_code != 200:
+				record('errors', f'add {resp.status_code}')
+				continue
+			record('added')
+			resp = client.post('/checkout', data={
+				'csrf_token': token, 'name': f'Shopper {n}', 'email': f's{n}@example.com',
+				'phone': '555-0100', 'address': f'{n} Stress Street',
+			})
+			if resp.status_code == 302:
+				record('checked_out')
+			elif resp.status_code == 409:
+				record('short')
+			else:
+				record('errors', f'checkout {resp.status_code}')
+
+	def kiosk():
+		client = app.test_client()
+		rng = random.Random(-1)
+		start_gate.wait()
+		for i in range(args.kiosk_orders):
+			order = {
+				'customer_name': f'Kiosk {i}', 'email': f'k{i}@example.com', 'phone': '555-0100',
+				'address': 'Kiosk', 'items': [{'product_id': args.product, 'quantity': rng.randint(1, 3)}],
+			}
+			resp = client.post('/api/orders/bulk', json={'orders': [order]}, headers={'X-API-Key': 'stress'})
+			body = resp.get_json() or {}
+			if resp.status_code != 200:
+				record('errors', f'bulk {resp.status_code}')
+			elif body.get('created'):
+				record('kiosk_ok')
+			else:
+				record('kiosk_short')
+
+	threads = [threading.Thread(target=shopper, args=(n,)) for n in range(args.shoppers - 1)]
+	threads.append(threading.Thread(target=kiosk))
+	began = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	start_gate.wait()
+	for thread in threads:
+		thread.join()
+	elapsed = time.perf_counter() - began
+
+	with app.app_context():
+		remaining = db.session.get(Product, args.product).stock
+		sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).filter(
+			OrderItem.product_id == args.product).scalar()
+		orders = db.session.query(Order).count()
+
+	print(f'{args.shoppers - 1} shoppers x {args.rounds} rounds + {args.kiosk_orders} kiosk orders in {elapsed:.2f}s')
+	for key in ('added', 'refused', 'checked_out', 'short', 'kiosk_ok', 'kiosk_short'):
+		print(f'  {key:12}: {outcomes[key]}')
+	print(f'  orders      : {orders}')
+	print(f'  stock       : {args.stock} initial, {sold} sold, {remaining} remaining')
+	if outcomes['errors']:
+		print(f"  errors      : {len(outcomes['errors'])} e.g. {outcomes['errors'][:5]}")
+	ok = remaining >= 0 and sold + remaining == args.stock and not outcomes['errors']
+	print('OK' if ok else 'FAILED: stock accounting does not add up')
+	raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app reads its configuration at import time, so point it at a scratch database first
+_db_dir = tempfile.mkdtemp(prefix='tea_coffee_shop_tests_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['JOB_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as shop  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+	shop.setup_db()
+	return shop.app
+
+
+@pytest.fixture
+def client(app):
+	return app.test_client()
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+import app as shop
+
+
+def test_sqlite_carts_unchanged_past_the_ttl_are_deleted(app):
+	store = shop.SQLiteCartStore()
+	with app.app_context():
+		store.apply('stale', {1: 1, 2: 3})
+		store.apply('active', {1: 2})
+		stale_time = datetime.utcnow() - timedelta(seconds=app.config['CART_TTL'] + 60)
+		shop.db.session.execute(
+			shop.db.update(shop.CartLine).where(shop.CartLine.cart_id.in_(['stale', 'active'])).values(updated_at=stale_time)
+		)
+		shop.db.session.commit()
+
+		store.apply('active', {2: 1})  # touches every line of the cart, not only the changed one
+		assert store.delete_expired() == 2
+		shop.db.session.commit()
+
+		assert store.load('stale') == {}
+		assert store.load('active') == {1: 2, 2: 1}
+
+
+def test_cart_expiry_sweep_uses_the_updated_at_index(app):
+	with app.app_context():
+		plan = shop.db.session.execute(shop.text(
+			'EXPLAIN QUERY PLAN DELETE FROM cart_line WHERE updated_at < :cutoff'
+		), {'cutoff': datetime.utcnow()}).all()
+	assert any('ix_cart_line_updated_at' in row[-1] for row in plan), plan
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+import app as shop
+from test_query_counts import count_statements
+
+
+def test_product_change_refreshes_only_that_product(app):
+	with app.app_context():
+		shop.catalog.get(1)
+		product = shop.db.session.get(shop.Product, 1)
+		new_price = Decimal(product.price) + 1
+		product.price = new_price
+		shop.db.session.commit()
+
+		with count_statements() as statements:
+			assert shop.catalog.get(1).price == new_price
+		product_reads = [s for s in statements if 'FROM product' in s]
+		assert len(product_reads) == 1 and 'WHERE product.id IN' in product_reads[0], statements
+
+
+def test_other_writers_are_picked_up_within_the_check_interval(app):
+	with app.app_context():
+		shop.catalog.get(2)
+		with shop.db.engine.begin() as conn:  # a write the session's commit hooks do not see
+			conn.exec_driver_sql("UPDATE product SET name = 'Renamed elsewhere' WHERE id = 2")
+		app.config['CATALOG_CHECK_INTERVAL'] = 0
+		try:
+			assert shop.catalog.get(2).name == 'Renamed elsewhere'
+		finally:
+			app.config['CATALOG_CHECK_INTERVAL'] = 60
+		with count_statements() as statements:
+			shop.catalog.get(2)
+		assert statements == []
+
+
+def test_cart_add_makes_no_database_round_trip(app, client):
+	app.config['CATALOG_CHECK_INTERVAL'] = 60
+	client.post('/cart/add', data={'product_id': 3}, headers={'Accept': 'application/json'})
+	with count_statements() as statements:
+		response = client.post('/cart/add', data={'product_id': 3}, headers={'Accept': 'application/json'})
+	assert response.get_json()['ok']
+	assert statements == []
@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+import app as shop
+
+
+@contextmanager
+def count_statements():
+	statements = []
+
+	def record(conn, cursor, statement, parameters, context, executemany):
+		statements.append(statement)
+
+	with shop.app.app_context():
+		engine = shop.db.engine
+	event.listen(engine, 'before_cursor_execute', record)
+	try:
+		yield statements
+	finally:
+		event.remove(engine, 'before_cursor_execute', record)
+
+
+def place_order(lines: int) -> int:
+	with shop.app.app_context():
+		products = shop.Product.query.order_by(shop.Product.id).limit(lines).all()
+		assert len(products) == lines
+		order = shop.Order(customer_name='Test', email='test@example.com', phone='555-0100',
+						   address='1 Test Street', delivery_option='Instant Delivery')
+		order.items = [shop.OrderItem(product_id=p.id, quantity=2, unit_price=p.price) for p in products]
+		shop.db.session.add(order)
+		shop.db.session.commit()
+		return order.id
+
+
+def order_statements(statements):
+	return [s for s in statements if '"order"' in s or 'order_item' in s or 'FROM product' in s]
+
+
+@pytest.mark.parametrize('path', ['/order_confirmation/{}', '/api/order/{}/status'])
+def test_order_pages_issue_the_same_statements_for_any_number_of_items(app, client, path):
+	counts = []
+	for lines in (1, 5):
+		order_id = place_order(lines)
+		client.get(path.format(order_id))  # warm the catalog and lease lookups
+		with count_statements() as statements:
+			response = client.get(path.format(order_id))
+		assert response.status_code == 200
+		counts.append(len(statements))
+		assert len(order_statements(statements)) <= 2, statements
+	assert counts[0] == counts[1]
+
+
+def test_order_confirmation_loads_order_and_items_in_two_statements(app, client):
+	order_id = place_order(5)
+	with count_statements() as statements:
+		response = client.get(f'/order_confirmation/{order_id}')
+	assert response.status_code == 200
+	assert len(order_statements(statements)) == 2, statements
+
+
+def test_order_total_is_a_sql_aggregate(app):
+	order_id = place_order(3)
+	with shop.app.app_context():
+		with count_statements() as statements:
+			order = shop.db.session.get(shop.Order, order_id)
+			total = order.total
+		assert len(statements) == 2  # the order row, then the deferred SUM over its items
+		assert 'sum(' in statements[-1].lower()
+		expected = sum(item.unit_price * item.quantity for item in order.items)
+		assert Decimal(str(total)) == expected
@@ -0,0 +1,9 @@
+import app as shop
+
+
+def test_route_queries_use_indexes(app):
+	with app.app_context():
+		plans = {name: shop.explain_query_plan(query) for name, query in shop.route_queries().items()}
+	full_scans = {name: ' | '.join(plan) for name, plan in plans.items() if shop.full_scan_steps(plan)}
+	assert all(plans.values())
+	assert full_scans == {}
@@ -0,0 +1,25 @@
+"""Production entry point for the shop.
+
+Importing the app does not create or migrate the database; run
+`flask --app app init-db` once before starting a server.
+
+Linux / macOS (multi-process):
+	gunicorn -c gunicorn.conf.py wsgi:application
+
+Windows or anywhere gunicorn is unavailable (multi-threaded):
+	python wsgi.py
+"""
+import os
+
+from app import app as application
+
+
+if __name__ == '__main__':
+	from waitress import serve
+
+	serve(
+		application,
+		host=os.environ.get('HOST', '0.0.0.0'),
+		port=int(os.environ.get('PORT', 8000)),
+		threads=int(os.environ.get('WEB_THREADS', 8))
+	)